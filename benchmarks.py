@@ -0,0 +1,208 @@
+"""
+  html-calendar benchmarks
+  ========================
+
+  Measures the rendering speed and memory of htmlcalendar. Run it with:
+
+    python benchmarks.py [--filter NAME] [--save FILE] [--compare FILE]
+
+  Results can be saved as a baseline and compared in later runs to catch
+  performance regressions between releases.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import timeit
+import tracemalloc
+from collections import namedtuple
+from datetime import date
+
+import htmlcalendar as hc
+
+
+STARTING_DATE = date(2024, 6, 15)
+
+Case = namedtuple("Case", ["name", "function", "cells", "months"])
+
+
+def noop_callbacks():
+    return {}
+
+
+def heavy_callbacks(count=4):
+    classes = [f"class-{i}" for i in range(count)]
+
+    def css_classes(date):
+        return classes if date.day % 2 else classes[:1]
+
+    def links(date):
+        return f"https://calendar.fake/{date.year}/{date.month}/{date.day}"
+
+    def attrs(date):
+        return {f"data-{i}": f"{date.day}&{i}" for i in range(count)}
+
+    return {"classes": css_classes, "links": links, "attrs": attrs}
+
+
+def month_cells(months):
+    """
+    Returns the number of day cells of the months of the calendar.
+    """
+    month_list = hc.backwards_iterator(STARTING_DATE, months - 1)
+    return sum(hc.month_bounds(month, year)[1].day
+               for month, year in month_list)
+
+
+def calendar_case(name, months, **kwargs):
+    def function():
+        list(hc.htmlcalendar(STARTING_DATE, months=months, **kwargs))
+    return Case(name, function, month_cells(months), months)
+
+
+def cases():
+    """
+    Returns the list of benchmark cases.
+    """
+    result = []
+    day = date(2024, 6, 15)
+    for safe in (False, True):
+        for kind, callbacks in (("noop", noop_callbacks()),
+                                ("heavy", heavy_callbacks())):
+            def function(callbacks=callbacks, safe=safe):
+                hc.htmlday(day, callbacks.get("classes", hc.nolist),
+                           callbacks.get("links", hc.nostr),
+                           callbacks.get("attrs", hc.noattrs), safe)
+            result.append(Case(f"htmlday-{kind}-safe{int(safe)}",
+                               function, 1, 0))
+
+    for kind, callbacks in (("noop", noop_callbacks()),
+                            ("heavy", heavy_callbacks()),
+                            ("heavy8", heavy_callbacks(8))):
+        for safe in (False, True):
+            def function(callbacks=callbacks, safe=safe):
+                hc.htmlmonth(6, 2024, safe=safe, **callbacks)
+            result.append(Case(f"htmlmonth-{kind}-safe{int(safe)}",
+                               function, 30, 1))
+
+    for months in (1, 3, 12, 120):
+        for kind, callbacks in (("noop", noop_callbacks()),
+                                ("heavy", heavy_callbacks())):
+            result.append(calendar_case(f"htmlcalendar-{months}-{kind}",
+                                        months, **callbacks))
+    for caltype in (0, 1):
+        for locale in (None, "C"):
+            result.append(calendar_case(
+                f"htmlcalendar-12-caltype{caltype}-locale{locale}", 12,
+                caltype=caltype, locale=locale, **heavy_callbacks()))
+
+    renderer = hc.CalendarRenderer()
+    callbacks = heavy_callbacks()
+
+    def function():
+        renderer.render_range(STARTING_DATE, months=12, **callbacks)
+    result.append(Case("renderer-12-heavy", function, month_cells(12), 12))
+
+    def function():
+        renderer.render_range(STARTING_DATE, months=600)
+    result.append(Case("renderer-600-noop", function, month_cells(600), 600))
+
+    events = hc.EventIndex(
+        (date.fromordinal(STARTING_DATE.toordinal() - i * 3), None,
+         ["event"], f"/event/{i}")
+        for i in range(5000))
+    result.append(calendar_case("htmlcalendar-12-events", 12, cells=events))
+    result.append(Case("htmlyear-heavy",
+                       lambda: hc.htmlyear(2024, **heavy_callbacks()),
+                       366, 12))
+    result.append(calendar_case("htmlcalendar-12-lrucache", 12,
+                                cache=hc.LRUCache(), **heavy_callbacks()))
+    return result
+
+
+def measure(case, min_time=0.2, repeat=5):
+    """
+    Returns the results of a case: the best time per call in seconds, the
+    nanoseconds per cell, the months per second and the peak of memory
+    allocated during a call.
+    """
+    timer = timeit.Timer(case.function)
+    number, elapsed = timer.autorange()
+    number = max(number, int(number * min_time / max(elapsed, 1e-9)))
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+
+    tracemalloc.start()
+    case.function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "seconds": best,
+        "ns_per_cell": best * 1e9 / case.cells,
+        "months_per_second": case.months / best if case.months else None,
+        "peak_bytes": peak,
+    }
+
+
+def report(name, result, baseline=None):
+    line = (f"{name:45} {result['ns_per_cell']:10.0f} ns/cell "
+            f"{result['peak_bytes'] / 1024:9.1f} KiB")
+    if result["months_per_second"]:
+        line += f" {result['months_per_second']:10.0f} months/s"
+    else:
+        line += " " * 19
+    if baseline is not None:
+        ratio = result["seconds"] / baseline["seconds"]
+        line += f" {ratio:6.2f}x"
+    print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("--filter", default="",
+                        help="run only the cases containing this text")
+    parser.add_argument("--min-time", type=float, default=0.2,
+                        help="minimum time in seconds of every repetition")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="repetitions of every case, the best is kept")
+    parser.add_argument("--save", metavar="FILE",
+                        help="save the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="FILE",
+                        help="compare the results with a saved baseline")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="slowdown ratio over the baseline that counts "
+                             "as a regression")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as fp:
+            baseline = json.load(fp)["results"]
+
+    results = {}
+    regressions = []
+    for case in cases():
+        if args.filter not in case.name:
+            continue
+        result = measure(case, args.min_time, args.repeat)
+        results[case.name] = result
+        report(case.name, result, baseline.get(case.name))
+        if case.name in baseline:
+            ratio = result["seconds"] / baseline[case.name]["seconds"]
+            if ratio > args.threshold:
+                regressions.append(case.name)
+
+    if args.save:
+        with open(args.save, "w") as fp:
+            json.dump({"version": hc.__version__,
+                       "python": platform.python_version(),
+                       "results": results}, fp, indent=2)
+    if regressions:
+        print(f"Regressions: {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,9 +8,36 @@
 
 __version__ = "0.0.24"
 
+import argparse
+import asyncio
 import calendar
+import contextlib
+import csv
+import datetime
+import gzip
+import hashlib
+import inspect
+import io
+import json
 import locale as lc
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from html import escape
+from types import MappingProxyType
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 WEEKDAYS0 = [""] * 7
@@ -33,82 +60,1232 @@ def update_weekdays():
     global WEEKDAYS0, WEEKDAYS1
     WEEKDAYS0 = list(calendar.day_abbr)
     WEEKDAYS1 = [WEEKDAYS0[6]] + list(WEEKDAYS0[0:6])
+    cached_renderer.cache_clear()
+
+
+class LocaleNames(namedtuple("LocaleNames", ["month_names", "weekdays0",
+                                             "weekdays1"])):
+    """
+    Immutable month and week days names of a locale. ``weekdays0`` starts
+    on monday and ``weekdays1`` on sunday.
+    """
+    __slots__ = ()
+
+
+LOCALE_LOCK = threading.Lock()
+
+
+@lru_cache(maxsize=64)
+def locale_names(locale):
+    """
+    Returns the ``LocaleNames`` of the given locale.
+
+    Names are read only the first time a locale is requested, switching
+    the process locale under a lock and restoring it right after, so
+    renders never depend on the locale active at the moment.
+    """
+    with LOCALE_LOCK:
+        previous = lc.setlocale(lc.LC_ALL)
+        try:
+            lc.setlocale(lc.LC_ALL, locale)
+            month_names = tuple(calendar.month_name)
+            weekdays = tuple(calendar.day_abbr)
+        finally:
+            lc.setlocale(lc.LC_ALL, previous)
+    return LocaleNames(month_names, weekdays, weekdays[6:] + weekdays[:6])
+
+
+def default_names():
+    """
+    Returns the ``LocaleNames`` used when no locale is given, taken from the
+    current locale month names and the module week days names. It must be
+    called holding ``LOCALE_LOCK``, so the names never come from a locale
+    temporarily set by ``locale_names``.
+    """
+    return LocaleNames(tuple(calendar.month_name), tuple(WEEKDAYS0),
+                       tuple(WEEKDAYS1))
 
 
 EMPTY_ROW = "<tr>" + 7 * "<td>&nbsp;</td>" + "</tr>"
+COMPACT_EMPTY_ROW = "<tr>" + 7 * "<td>&nbsp;" + "</tr>"
+
+DAY_CELLS = [f"<td>{day}</td>" for day in range(32)]
+
+DAYS = [escape(str(day)) for day in range(32)]
+
+
+EMPTY_ATTRS = MappingProxyType({})
+
+
+class Cell(namedtuple("Cell", ["classes", "link", "attrs"],
+                      defaults=[(), "", EMPTY_ATTRS])):
+    """
+    Formatting of a day cell as returned by ``cells`` providers: the list of
+    classes, the link and the dict of attributes of the cell. The default
+    attributes are a read only empty mapping shared by all the cells.
+    """
+    __slots__ = ()
+
+
+EMPTY_CELL = Cell()
+
+
+class CellPatch(namedtuple("CellPatch", ["date", "classes", "link", "attrs",
+                                         "html"])):
+    """
+    Change of a day cell: its date, its new classes, link and attributes
+    and the new HTML of the whole cell.
+    """
+    __slots__ = ()
+
+
+def with_data_date(day_html):
+    """
+    Wraps a day cell renderer adding the ``data-date`` attribute to cells.
+    """
+    def day_html_with_date(date):
+        return f'<td data-date="{date.isoformat()}"{day_html(date)[3:]}'
+    return day_html_with_date
+
+
+def cell_values(classes=nolist, links=nostr, attrs=noattrs, data=None):
+    """
+    Returns a function that takes a date and returns its ``Cell``, taken
+    from the ``data`` dict if given or else from the callbacks.
+    """
+    if data is not None:
+        return lambda date: data.get(date, EMPTY_CELL)
+
+    def values(date):
+        ls = links(date)
+        atdict = attrs(date)
+        cs = classes(date)
+        return Cell(cs, ls, atdict)
+    return values
+
+
+async def resolve(value):
+    """
+    Awaits ``value`` if it is awaitable or else returns it.
+    """
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+
+async def gather_values(date, classes, links, attrs):
+    """
+    Returns the ``Cell`` of the date awaiting its callbacks concurrently.
+    """
+    ls, atdict, cs = await asyncio.gather(resolve(links(date)),
+                                          resolve(attrs(date)),
+                                          resolve(classes(date)))
+    return Cell(cs, ls, atdict)
 
 
 def htmlday(date, classes, links, attrs, safe):
-    result = []
     ls = links(date)
     atdict = attrs(date)
     cs = classes(date)
-    if cs:
-        if safe:
-            atdict['class'] = " ".join([c for c in cs])
-        else:
-            atdict['class'] = " ".join([escape(c) for c in cs])
+    return htmlcell(date.day, cs, ls, atdict, safe)
 
-    if atdict:
-        if safe:
-            ats = " ".join([f'{k}="{v}"' for k, v in atdict.items()])
+
+def htmlcell(day, cs, ls, atdict, safe):
+    if cs or atdict:
+        classes = tuple(cs) if cs else ()
+        items = tuple(atdict.items()) if atdict else ()
+        # Only strings are memoized, as values of other types may be equal
+        # to strings or to each other, like 1 and True, or not hashable
+        if (all(type(c) is str for c in classes) and
+                all(type(k) is str and type(v) is str for k, v in items)):
+            td = td_tag(classes, items, safe)
         else:
-            ats = [f'{escape(k)}="{escape(v)}"' for k, v in atdict.items()]
-            ats = " ".join(ats)
-        result.append(f"<td {ats}>")
+            td = td_tag.__wrapped__(classes, items, safe)
     else:
-        result.append("<td>")
+        td = "<td>"
     if ls:
+        if type(ls) is str:
+            link = link_tag(ls, safe)
+        else:
+            link = link_tag.__wrapped__(ls, safe)
+        return f"{td}{link}{DAYS[day]}</a></td>"
+    return f"{td}{DAYS[day]}</td>"
+
+
+ESCAPE_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=ESCAPE_CACHE_SIZE)
+def td_tag(classes, items, safe):
+    """
+    Returns the opening tag of a cell with the ``classes`` tuple and the
+    ``items`` tuple of (key, value) attributes, escaped unless ``safe``.
+
+    Results are memoized, so cells repeating the same decoration cost a
+    single lookup. ``htmlcell`` only goes through the memo with strings.
+    """
+    atdict = dict(items)
+    if classes:
         if safe:
-            result.append(f'<a href="{ls}">')
+            atdict['class'] = " ".join([c for c in classes])
         else:
-            result.append(f'<a href="{escape(ls)}">')
+            atdict['class'] = " ".join([escape(c) for c in classes])
+    if safe:
+        ats = " ".join([f'{k}="{v}"' for k, v in atdict.items()])
+    else:
+        ats = " ".join([f'{escape(k)}="{escape(v)}"'
+                        for k, v in atdict.items()])
+    return f"<td {ats}>"
 
-    result.append(escape(str(date.day)))
-    if ls:
-        result.append("</a>")
-    result.append("</td>")
-    return "".join(result)
+
+@lru_cache(maxsize=ESCAPE_CACHE_SIZE)
+def link_tag(link, safe):
+    """
+    Returns the memoized opening tag of a link, escaped unless ``safe``.
+    ``htmlcell`` only goes through the memo with strings.
+    """
+    if safe:
+        return f'<a href="{link}">'
+    return f'<a href="{escape(link)}">'
+
+
+SKELETONS = {}
+
+
+def month_skeleton(year, month, caltype=0, compact=False, padding=True,
+                   layout=None):
+    """
+    Returns the skeleton of the body of the month table, the tuple of the
+    static HTML fragments that go before, between and after the cells of
+    the days of the month.
+
+    The layout of a month only depends on its first week day, its number
+    of days and the calendar type, so skeletons are computed once per
+    layout and shared by all the months with the same one. ``compact``
+    and ``padding`` select the markup as explained in ``minify``. The
+    ``layout`` of the month, as returned by ``month_layouts``, can be
+    passed if already known.
+    """
+    weekday, days = layout or calendar.monthrange(year, month)
+    if compact or not padding:
+        key = (weekday, days, caltype, bool(compact), bool(padding))
+        skeleton = SKELETONS.get(key)
+        if skeleton is None:
+            skeleton = SKELETONS[key] = tuple(
+                minify(fragment, compact, padding)
+                for fragment in month_skeleton(year, month, caltype,
+                                               layout=layout))
+        return skeleton
+    key = (weekday, days, caltype)
+    skeleton = SKELETONS.get(key)
+    if skeleton is None:
+        skeleton = SKELETONS[key] = build_skeleton(year, month, caltype)
+    return skeleton
+
+
+def minify(fragment, compact=True, padding=True):
+    """
+    Returns a static fragment of the tables without the padding row added
+    to the months of five weeks if ``padding`` is false and, if
+    ``compact``, without new lines and with the optional ``</td>`` end tags
+    of the empty cells left out, which is valid HTML.
+    """
+    if not padding:
+        fragment = fragment.replace(EMPTY_ROW, "")
+    if compact:
+        fragment = fragment.replace("\n", "").replace("<td></td>", "<td>")
+        fragment = fragment.replace(EMPTY_ROW, COMPACT_EMPTY_ROW)
+    return fragment
+
+
+NUMPY_MIN_MONTHS = 64
+
+
+def month_layouts(month_list):
+    """
+    Returns the list of the layouts, the tuples of the first week day and
+    the number of days, of the (month, year) tuples of ``month_list``.
+
+    If NumPy is installed the layouts of the lists of at least
+    ``NUMPY_MIN_MONTHS`` months are computed at once with vectorized
+    operations, shorter lists are faster without the arrays overhead.
+    """
+    if numpy is None or len(month_list) < NUMPY_MIN_MONTHS:
+        return [calendar.monthrange(year, month)
+                for month, year in month_list]
+    months = numpy.array([(year - 1970) * 12 + month - 1
+                          for month, year in month_list])
+    months = months.astype("datetime64[M]")
+    first_days = months.astype("datetime64[D]")
+    days = (months + 1).astype("datetime64[D]") - first_days
+    # The 1st of January of 1970 was a Thursday
+    weekdays = (first_days.astype("int64") + 3) % 7
+    return list(zip(weekdays.tolist(), days.astype("int64").tolist()))
+
+
+def build_skeleton(year, month, caltype=0):
+    result = []
+    fragment = []
+    week_count = 0
+    for date in calendar.Calendar(caltype).itermonthdates(year, month):
+        weekday = date.weekday()
+        if weekday == 0:
+            week_count += 1
+            fragment.append("<tr>\n")
+        if date.month != month:
+            fragment.append("<td></td>")
+        else:
+            result.append("".join(fragment))
+            fragment = []
+        if weekday == 6:
+            fragment.append("</tr>\n")
+    if week_count == 5:
+        fragment.append(EMPTY_ROW)
+    fragment.append("</table>\n\n")
+    result.append("".join(fragment))
+    return tuple(result)
+
+
+def save_skeletons(path, first_year, last_year, caltypes=(0, 1)):
+    """
+    Saves into a gzipped JSON file the skeletons of all the months from
+    ``first_year`` to ``last_year``, both included, for the calendar
+    types in ``caltypes``. Skeletons shared by several months are stored
+    only once.
+    """
+    layouts = []
+    for caltype in caltypes:
+        for year in range(first_year, last_year + 1):
+            for month in range(1, 13):
+                month_skeleton(year, month, caltype)
+                weekday, days = calendar.monthrange(year, month)
+                layouts.append((weekday, days, caltype))
+    layouts = sorted(set(layouts))
+    data = [[weekday, days, caltype, SKELETONS[(weekday, days, caltype)]]
+            for weekday, days, caltype in layouts]
+    with gzip.open(path, "wt", encoding="utf-8") as fp:
+        json.dump({"version": 1, "skeletons": data}, fp,
+                  separators=(",", ":"))
 
 
-def html_week_days(caltype):
+def load_skeletons(path):
+    """
+    Loads the skeletons saved with ``save_skeletons`` so no skeleton has to
+    be computed while rendering. Only load files you created.
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as fp:
+        data = json.load(fp)
+    for weekday, days, caltype, skeleton in data["skeletons"]:
+        SKELETONS[(weekday, days, caltype)] = tuple(skeleton)
+
+
+def html_week_days(caltype, names=None):
     result = ["<tr>"]
-    wds = WEEKDAYS1 if caltype else WEEKDAYS0
+    if names is None:
+        wds = WEEKDAYS1 if caltype else WEEKDAYS0
+    else:
+        wds = names.weekdays1 if caltype else names.weekdays0
     for wd in wds:
         result.append(f"<th>{escape(wd)}</th>")
     result.append("</tr>\n")
     return "".join(result)
 
 
+class CalendarRenderer:
+    """
+    Month tables renderer compiled once from a calendar configuration.
+
+    All the static fragments of the tables (month headers, table tag and
+    week days row) are escaped and joined at construction time, so every
+    render only does the work of the day cells. Instances are meant to be
+    built once and reused for every render with the same configuration.
+
+    Parameters
+    ----------
+
+    caltype: int
+        If you want weeks starting on sunday 1 else 0
+    header: string
+        Set the html header level for the calendar month name
+    th_classes: list
+        A list of classes to be put in each one of the weekdays labels.
+    table_classes: list
+        A list of classes to be put in the main table object.
+    locale: string
+        Set the locale name used for naming month and week days names,
+        that are resolved through ``locale_names`` without changing the
+        process locale. If not given the month names of the locale active
+        at construction time are used.
+    safe: bool
+        If false escapes all variables that go into the templates
+    data_dates: bool
+        If true every day cell gets a ``data-date`` attribute with the ISO
+        date, so clients can find the cells to apply patches to.
+    compact: bool
+        If true the tables are rendered without new lines and without the
+        end tags of the empty cells.
+    padding: bool
+        If false the months of five weeks do not get an empty sixth row.
+    """
+
+    def __init__(self, caltype=0, header="h3", th_classes=[],
+                 table_classes=[], locale=None, safe=False,
+                 data_dates=False, compact=False, padding=True):
+        self.caltype = caltype
+        self.safe = safe
+        self.locale = locale
+        self.data_dates = data_dates
+        self.compact = compact
+        self.padding = padding
+        self.key = repr((caltype, header, tuple(th_classes),
+                         tuple(table_classes), locale, safe, data_dates))
+        if compact or not padding:
+            self.key += repr((bool(compact), bool(padding)))
+        if locale is not None:
+            self.names = locale_names(locale)
+        else:
+            with LOCALE_LOCK:
+                self.names = default_names()
+                self.key += repr(lc.setlocale(lc.LC_TIME))
+        header = escape(header)
+        self.month_headers = [""] + [
+            f"<{header}>{escape(name)}</{header}>"
+            for name in self.names.month_names[1:]
+        ]
+        if table_classes:
+            cls = ' '.join([escape(c) for c in table_classes])
+            table = f'<table class="{cls}">'
+        else:
+            table = "<table>"
+        self.table_head = minify(table + html_week_days(caltype, self.names),
+                                 compact)
+
+    def cache_key(self, month, year, version=None):
+        """
+        Returns the key of the month in month caches, made of the month, the
+        renderer configuration and the version of the callbacks data.
+        """
+        return f"{year:04d}-{month:02d}:{self.key}:{version!r}"
+
+    def render_month(self, month, year, classes=nolist, links=nostr,
+                     attrs=noattrs, cells=None, cache=None, version=None,
+                     observer=None):
+        """
+        Returns the HTML of the table of the given month.
+
+        If a ``cells`` provider is given it is called once with the first
+        and last dates of the month instead of calling the ``classes``,
+        ``links`` and ``attrs`` callbacks for every day.
+
+        If a ``cache`` is given the month is looked up there first and
+        stored after rendering. ``version`` identifies the state of the
+        data returned by the callbacks and is part of the cache key.
+
+        If an ``observer`` is given the callbacks and the month render are
+        timed and reported to it.
+        """
+        if observer is not None:
+            start = time.perf_counter()
+            result = self.render_month(
+                month, year, timed(observer, "classes", classes),
+                timed(observer, "links", links),
+                timed(observer, "attrs", attrs),
+                None if cells is None else timed(observer, "cells", cells),
+                cache, version)
+            observer.month(month, year, time.perf_counter() - start,
+                           calendar.monthrange(year, month)[1],
+                           len(result.encode("utf-8")))
+            return result
+
+        if cache is not None:
+            key = self.cache_key(month, year, version)
+            result = cache.get(key)
+            if result is None:
+                result = self.render_month(month, year, classes, links,
+                                           attrs, cells)
+                cache.set(key, result)
+            return result
+
+        data = None
+        if cells is not None:
+            data = cells(*month_bounds(month, year))
+        day_html = self.day_renderer(classes, links, attrs, data)
+        return self.assemble_month(month, year,
+                                   self.month_cells(month, year, day_html))
+
+    def day_renderer(self, classes=nolist, links=nostr, attrs=noattrs,
+                     data=None):
+        """
+        Returns a function that takes a date and returns the HTML of its
+        cell. Cells are formatted from the ``data`` dict of ``Cell`` tuples
+        if given or else from the callbacks.
+
+        The function is specialized for the callbacks in use, so the
+        default ``nolist``, ``nostr`` and ``noattrs`` callbacks are never
+        called.
+        """
+        safe = self.safe
+        default_classes = classes is nolist
+        default_links = links is nostr
+        default_attrs = attrs is noattrs
+        if data is not None:
+            def day_html(date):
+                cell = data.get(date)
+                if cell is None:
+                    return DAY_CELLS[date.day]
+                return htmlcell(date.day, *cell, safe)
+        elif default_classes and default_links and default_attrs:
+            def day_html(date):
+                return DAY_CELLS[date.day]
+        elif default_classes and default_attrs:
+            def day_html(date):
+                ls = links(date)
+                if ls:
+                    return htmlcell(date.day, (), ls, None, safe)
+                return DAY_CELLS[date.day]
+        elif default_links and default_attrs:
+            def day_html(date):
+                cs = classes(date)
+                if cs:
+                    return htmlcell(date.day, cs, "", None, safe)
+                return DAY_CELLS[date.day]
+        else:
+            def day_html(date):
+                return htmlday(date, classes, links, attrs, safe)
+        if self.data_dates:
+            return with_data_date(day_html)
+        return day_html
+
+    def cell_html(self, date, cell):
+        """
+        Returns the HTML of the cell of the date formatted with ``cell``.
+        """
+        result = htmlcell(date.day, *cell, self.safe)
+        if self.data_dates:
+            return f'<td data-date="{date.isoformat()}"{result[3:]}'
+        return result
+
+    def month_cells(self, month, year, day_html):
+        """
+        Returns the list of HTML cells of the days of the month.
+        """
+        days = calendar.monthrange(year, month)[1]
+        return [day_html(datetime.date(year, month, day))
+                for day in range(1, days + 1)]
+
+    def assemble_month(self, month, year, day_cells, layout=None):
+        """
+        Returns the HTML of the month table made with the ``day_cells``
+        list of the HTML cells of every day of the month.
+        """
+        skeleton = month_skeleton(year, month, self.caltype, self.compact,
+                                  self.padding, layout)
+        result = [None] * (2 * len(skeleton) - 1)
+        result[0::2] = skeleton
+        result[1::2] = day_cells
+        return self.month_headers[month] + self.table_head + "".join(result)
+
+    def render_range(self, starting_date, months=3, classes=nolist,
+                     links=nostr, attrs=noattrs, backwards=True, cells=None,
+                     cache=None, version=None, observer=None, workers=None,
+                     executor=None):
+        """
+        Returns the list of month tables starting at the month of
+        ``starting_date`` in display order, oldest month first.
+
+        A ``cells`` provider is called at most once for the whole range.
+        Months are rendered concurrently in a thread pool if ``workers``
+        or ``executor`` are given.
+        """
+        iterator = backwards_iterator if backwards else forward_iterator
+        month_list = list(iterator(starting_date, months - 1))
+        if (cache is None and observer is None and workers is None
+                and executor is None):
+            if backwards:
+                month_list.reverse()
+            return self.render_months(month_list, classes, links, attrs,
+                                      cells)
+        if cells is not None:
+            cells = preloaded_cells(cells, month_list, observer)
+
+        def render(month_year):
+            return self.render_month(*month_year, classes, links, attrs,
+                                     cells, cache, version, observer)
+
+        result = parallel_map(render, month_list, workers, executor)
+        if backwards:
+            result.reverse()
+        return result
+
+    def render_days(self, start, end, classes=nolist, links=nostr,
+                    attrs=noattrs, cells=None):
+        """
+        Returns a table with only the weeks from the one of ``start`` to
+        the one of ``end``, where the days out of that range of dates are
+        left empty. Callbacks, or the ``cells`` provider, are called only
+        for the days in the range.
+        """
+        data = None
+        if cells is not None:
+            data = cells(start, end)
+        day_html = self.day_renderer(classes, links, attrs, data)
+        one_day = datetime.timedelta(days=1)
+        # Weeks start on Monday, or on Sunday with caltype 1
+        day = start - (start.weekday() + self.caltype) % 7 * one_day
+        row_start, empty, row_end, table_end = (
+            minify(fragment, self.compact)
+            for fragment in ("<tr>\n", "<td></td>", "</tr>\n",
+                             "</table>\n\n"))
+        result = [self.table_head]
+        while day <= end:
+            result.append(row_start)
+            for _ in range(7):
+                if start <= day <= end:
+                    result.append(day_html(day))
+                else:
+                    result.append(empty)
+                day += one_day
+            result.append(row_end)
+        result.append(table_end)
+        return "".join(result)
+
+    def render_months(self, month_list, classes=nolist, links=nostr,
+                      attrs=noattrs, cells=None):
+        """
+        Returns the list of the month tables of the consecutive months of
+        ``month_list``, oldest month first.
+
+        The day cells of all the months are rendered in one pass over the
+        dates of the range, a ``cells`` provider is called once for it and
+        the layouts of the months come from ``month_layouts``.
+        """
+        first, last = range_bounds(month_list)
+        data = None
+        if cells is not None:
+            data = cells(first, last)
+        day_html = self.day_renderer(classes, links, attrs, data)
+        from_ordinal = datetime.date.fromordinal
+        day_cells = [day_html(from_ordinal(ordinal))
+                     for ordinal in range(first.toordinal(),
+                                          last.toordinal() + 1)]
+        result = []
+        offset = 0
+        for (month, year), layout in zip(month_list,
+                                         month_layouts(month_list)):
+            days = layout[1]
+            result.append(self.assemble_month(
+                month, year, day_cells[offset:offset + days], layout))
+            offset += days
+        return result
+
+    def render_grid(self, month_list, columns=3, grid_classes=[],
+                    classes=nolist, links=nostr, attrs=noattrs, cells=None):
+        """
+        Returns a single table that lays out the month tables of the
+        consecutive months of ``month_list``, in that order, in rows of
+        ``columns`` months.
+
+        The month tables are rendered with ``render_months``.
+        """
+        tables = self.render_months(month_list, classes, links, attrs, cells)
+        if grid_classes:
+            cls = ' '.join([escape(c) for c in grid_classes])
+            table = f'<table class="{cls}">\n'
+        else:
+            table = "<table>\n"
+        row_start, row_end, empty, table_end = (
+            minify(fragment, self.compact)
+            for fragment in ("<tr>\n", "</tr>\n", "<td></td>",
+                             "</table>\n\n"))
+        result = [minify(table, self.compact)]
+        for index, html in enumerate(tables):
+            if index % columns == 0:
+                result.append(row_start)
+            result.append(f"<td>{html}</td>")
+            if index % columns == columns - 1:
+                result.append(row_end)
+        if len(month_list) % columns:
+            result.append(empty * (columns - len(month_list) % columns))
+            result.append(row_end)
+        result.append(table_end)
+        return "".join(result)
+
+    async def arender_month(self, month, year, classes=nolist, links=nostr,
+                            attrs=noattrs, cells=None, cache=None,
+                            version=None, semaphore=None):
+        """
+        Coroutine version of ``render_month`` whose callbacks and ``cells``
+        provider may be coroutine functions. The callbacks of all the days
+        are awaited concurrently, limited by the optional ``semaphore``.
+        """
+        if cache is not None:
+            key = self.cache_key(month, year, version)
+            result = cache.get(key)
+            if result is None:
+                result = await self.arender_month(month, year, classes,
+                                                  links, attrs, cells,
+                                                  semaphore=semaphore)
+                cache.set(key, result)
+            return result
+
+        days = calendar.monthrange(year, month)[1]
+        dates = [datetime.date(year, month, day)
+                 for day in range(1, days + 1)]
+        if cells is not None:
+            data = await resolve(cells(dates[0], dates[-1]))
+            values = [data.get(date, EMPTY_CELL) for date in dates]
+        else:
+            async def day_values(date):
+                if semaphore is None:
+                    return await gather_values(date, classes, links, attrs)
+                async with semaphore:
+                    return await gather_values(date, classes, links, attrs)
+            values = await asyncio.gather(*[day_values(d) for d in dates])
+        day_cells = [self.cell_html(date, cell)
+                     for date, cell in zip(dates, values)]
+        return self.assemble_month(month, year, day_cells)
+
+    def render_state(self, starting_date, months=3, classes=nolist,
+                     links=nostr, attrs=noattrs, backwards=True, cells=None):
+        """
+        Renders the range like ``render_range`` and returns a
+        ``CalendarState`` that can be updated when some dates change.
+        """
+        iterator = backwards_iterator if backwards else forward_iterator
+        month_list = list(iterator(starting_date, months - 1))
+        if backwards:
+            month_list.reverse()
+        return CalendarState(self, month_list, classes, links, attrs, cells)
+
+
+class CalendarState:
+    """
+    Rendered calendar that keeps the HTML of every day cell so it can be
+    updated incrementally.
+
+    When some dates change ``update`` runs the callbacks, or the ``cells``
+    provider, only for those dates and reassembles only the months that
+    contain them. Instances are created with ``CalendarRenderer.render_state``.
+    """
+
+    def __init__(self, renderer, month_list, classes=nolist, links=nostr,
+                 attrs=noattrs, cells=None):
+        self.renderer = renderer
+        self.months = month_list
+        self.classes = classes
+        self.links = links
+        self.attrs = attrs
+        self.cells = cells
+        self.day_cells = {}
+        self.tables = {}
+        data = None
+        if cells is not None:
+            data = cells(*range_bounds(month_list))
+        day_html = renderer.day_renderer(classes, links, attrs, data)
+        for month, year in month_list:
+            day_cells = renderer.month_cells(month, year, day_html)
+            self.day_cells[(year, month)] = day_cells
+            self.tables[(year, month)] = renderer.assemble_month(month, year,
+                                                                 day_cells)
+
+    def html(self):
+        """
+        Returns the list of month tables in display order.
+        """
+        return [self.tables[(year, month)] for month, year in self.months]
+
+    def update(self, dates):
+        """
+        Renders again the cells of the given dates, ignoring the ones out
+        of the calendar, and returns the updated list of month tables.
+        """
+        self.patch(dates)
+        return self.html()
+
+    def patch(self, dates):
+        """
+        Renders again the cells of the given dates like ``update`` and
+        returns the list of ``CellPatch`` of the cells that changed.
+        """
+        result = []
+        dates = sorted(set(d for d in dates
+                           if (d.year, d.month) in self.day_cells))
+        if not dates:
+            return result
+        data = None
+        if self.cells is not None:
+            data = self.cells(dates[0], dates[-1])
+        values = cell_values(self.classes, self.links, self.attrs, data)
+        changed = set()
+        for date in dates:
+            key = (date.year, date.month)
+            cell = values(date)
+            html = self.renderer.cell_html(date, cell)
+            if html != self.day_cells[key][date.day - 1]:
+                self.day_cells[key][date.day - 1] = html
+                changed.add(key)
+                result.append(CellPatch(date, *cell, html))
+        for year, month in changed:
+            self.tables[(year, month)] = self.renderer.assemble_month(
+                month, year, self.day_cells[(year, month)])
+        return result
+
+
+def get_renderer(caltype=0, header="h3", th_classes=(), table_classes=(),
+                 locale=None, safe=False, data_dates=False, compact=False,
+                 padding=True):
+    """
+    Returns a shared ``CalendarRenderer`` for the given configuration.
+
+    Class lists must be passed as tuples so the configuration is hashable.
+    Without a ``locale`` the renderer of the current time locale of the
+    process is returned, so month names follow locale changes.
+    """
+    time_locale = None
+    if locale is None:
+        with LOCALE_LOCK:
+            time_locale = lc.setlocale(lc.LC_TIME)
+    return cached_renderer(caltype, header, th_classes, table_classes,
+                           locale, safe, data_dates, compact, padding,
+                           time_locale)
+
+
+@lru_cache(maxsize=128)
+def cached_renderer(caltype, header, th_classes, table_classes, locale, safe,
+                    data_dates, compact, padding, time_locale):
+    return CalendarRenderer(caltype=caltype, header=header,
+                            th_classes=th_classes,
+                            table_classes=table_classes, locale=locale,
+                            safe=safe, data_dates=data_dates,
+                            compact=compact, padding=padding)
+
+
+def preloaded_cells(cells, month_list, observer=None):
+    """
+    Returns a provider that calls ``cells`` once for all the months of
+    ``month_list`` the first time it is used and then answers from the
+    fetched mapping. That single call is timed if an ``observer`` is given.
+    """
+    if observer is not None:
+        cells = timed(observer, "cells", cells)
+    fetched = []
+    lock = threading.Lock()
+
+    def provider(start, end):
+        with lock:
+            if not fetched:
+                fetched.append(cells(*range_bounds(month_list)))
+        return fetched[0]
+    provider.preloaded = True
+    return provider
+
+
+def fixed_cells(data):
+    """
+    Returns a provider that answers the already fetched ``data`` mapping.
+    """
+    def provider(start, end):
+        return data
+    return provider
+
+
+class RenderObserver:
+    """
+    Receiver of the timings of renders, that does nothing with them.
+
+    Subclasses can override its methods to record the timings or forward
+    them to tracing systems.
+    """
+
+    def callback(self, kind, elapsed):
+        """
+        Called after every call to a callback. ``kind`` is one of
+        "classes", "links", "attrs" or "cells" and ``elapsed`` the seconds
+        spent in the call.
+        """
+
+    def month(self, month, year, elapsed, cells, size):
+        """
+        Called after rendering a month with the seconds it took, including
+        the callbacks, its number of day cells and the size in bytes of its
+        UTF-8 encoded HTML.
+        """
+
+
+class RenderStats(RenderObserver):
+    """
+    Observer that accumulates the number of calls and time spent in every
+    kind of callback, the number and time of month renders and the cells
+    and bytes rendered.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.callback_time = {}
+        self.months = 0
+        self.month_time = 0.0
+        self.cells = 0
+        self.bytes = 0
+
+    def callback(self, kind, elapsed):
+        with self.lock:
+            self.calls[kind] = self.calls.get(kind, 0) + 1
+            self.callback_time[kind] = (self.callback_time.get(kind, 0.0) +
+                                        elapsed)
+
+    def month(self, month, year, elapsed, cells, size):
+        with self.lock:
+            self.months += 1
+            self.month_time += elapsed
+            self.cells += cells
+            self.bytes += size
+
+    @property
+    def format_time(self):
+        """
+        Seconds spent rendering months out of the callbacks.
+        """
+        return self.month_time - sum(self.callback_time.values())
+
+    def as_dict(self):
+        return {
+            "calls": dict(self.calls),
+            "callback_time": dict(self.callback_time),
+            "months": self.months,
+            "month_time": self.month_time,
+            "format_time": self.format_time,
+            "cells": self.cells,
+            "bytes": self.bytes,
+        }
+
+
+def timed(observer, kind, function):
+    """
+    Wraps ``function`` reporting the time of every call to ``observer``.
+    The default callbacks, that renders never call, and the providers of
+    ``preloaded_cells``, that time their own fetch, are returned as they
+    are.
+    """
+    if (function is nolist or function is nostr or function is noattrs or
+            getattr(function, "preloaded", False) is True):
+        return function
+
+    def timed_function(*args):
+        start = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            observer.callback(kind, time.perf_counter() - start)
+    return timed_function
+
+
+class LRUCache:
+    """
+    In process cache of rendered months that keeps at most ``maxsize``
+    entries, evicting the least recently used ones, and optionally
+    expires entries ``ttl`` seconds after they were stored.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.data)
+
+    def get(self, key):
+        with self.lock:
+            item = self.data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires is not None and expires < time.monotonic():
+                del self.data[key]
+                return None
+            self.data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires = None if self.ttl is None else time.monotonic() + self.ttl
+        with self.lock:
+            self.data[key] = (value, expires)
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.data.pop(key, None)
+
+    def delete_where(self, predicate):
+        """
+        Removes all the entries whose key makes ``predicate`` true.
+        """
+        with self.lock:
+            for key in [key for key in self.data if predicate(key)]:
+                del self.data[key]
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+
+class CallbackCache:
+    """
+    Memo of the results of ``classes``, ``links`` and ``attrs`` callbacks
+    shared between renders, so overlapping calendars and repeated views
+    call them once per date.
+
+    It keeps at most ``maxsize`` results, evicting the least recently used
+    ones, for at most ``ttl`` seconds if given. Results are cached by
+    namespace, for example a tenant, callback and date, and can be
+    invalidated by date, range of dates or namespace.
+    """
+
+    def __init__(self, maxsize=4096, ttl=None):
+        self.cache = LRUCache(maxsize, ttl)
+
+    def __len__(self):
+        return len(self.cache)
+
+    def wrap(self, function, namespace=None, name=None):
+        """
+        Returns the memoized version of the callback ``function``.
+
+        Results are cached under ``namespace`` and ``name``, that defaults
+        to the function itself, so wrapping again an equal function reuses
+        its results. Pass a ``name`` to share results between functions
+        created on every request.
+        """
+        name = function if name is None else name
+
+        def memoized(date):
+            key = (namespace, name, date)
+            item = self.cache.get(key)
+            if item is None:
+                item = (function(date),)
+                self.cache.set(key, item)
+            return item[0]
+        return memoized
+
+    def invalidate(self, start=None, end=None, namespace=None):
+        """
+        Forgets the results of the ``start`` date, or of the dates from
+        ``start`` to ``end`` both included if ``end`` is given, limited to
+        ``namespace`` if given. Without dates it forgets all the results
+        of ``namespace``, and without any argument all the results.
+        """
+        if start is not None and end is None:
+            end = start
+
+        def matches(key):
+            if namespace is not None and key[0] != namespace:
+                return False
+            return start is None or start <= key[2] <= end
+        self.cache.delete_where(matches)
+
+
+class FileCache:
+    """
+    Cache of rendered months stored as files in ``directory`` so it can be
+    shared by all the processes of a node, for example placing it in
+    ``/dev/shm``. Entries expire ``ttl`` seconds after being written and
+    when more than ``maxsize`` files are stored the oldest are removed.
+    Files are written atomically.
+    """
+    prune_every = 100
+
+    def __init__(self, directory, ttl=None, maxsize=None):
+        self.directory = directory
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.writes = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        name = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, name + ".html")
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            if self.ttl is not None:
+                if os.path.getmtime(path) + self.ttl < time.time():
+                    return None
+            with open(path, encoding="utf-8") as fp:
+                return fp.read()
+        except FileNotFoundError:
+            return None
+
+    def set(self, key, value):
+        write_atomic(self.path(key), value)
+        self.writes += 1
+        if ((self.ttl is not None or self.maxsize is not None) and
+                self.writes % self.prune_every == 0):
+            self.prune()
+
+    def delete(self, key):
+        try:
+            os.unlink(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def entries(self):
+        result = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(".html"):
+                    try:
+                        result.append((entry.stat().st_mtime, entry.path))
+                    except FileNotFoundError:
+                        pass
+        return sorted(result)
+
+    def prune(self):
+        """
+        Removes the expired entries and the oldest ones over ``maxsize``.
+        """
+        entries = self.entries()
+        if self.ttl is not None:
+            limit = time.time() - self.ttl
+            expired = [x for x in entries if x[0] < limit]
+            entries = entries[len(expired):]
+        else:
+            expired = []
+        if self.maxsize is not None and len(entries) > self.maxsize:
+            expired += entries[:len(entries) - self.maxsize]
+        for mtime, path in expired:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        for mtime, path in self.entries():
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+
+class Event(namedtuple("Event", ["start", "end", "classes", "link", "attrs"],
+                       defaults=[None, (), "", EMPTY_ATTRS])):
+    """
+    Formatting applied to every day from ``start`` to ``end``, both
+    included. Events without ``end`` last only the ``start`` day.
+    """
+    __slots__ = ()
+
+
+class EventIndex:
+    """
+    Index of events sorted by date that answers the cells of whole ranges
+    at once. Instances are ``cells`` providers, so they can be passed
+    directly as the ``cells`` option of ``htmlcalendar`` and ``htmlmonth``.
+
+    Events are ``Event`` tuples or tuples of (start, end, classes, link,
+    attrs). When several events share a day their classes are joined in
+    order of their start dates, the link of the first one having a link is
+    used and the attributes are merged with the later events overriding
+    the earlier. A ``ValueError`` is raised for events ending before they
+    start.
+    """
+
+    def __init__(self, events=()):
+        self.events = sorted([Event(*event) for event in events],
+                             key=lambda event: event.start)
+        # Events are grouped in tiers by the power of two of their length,
+        # so a query only goes back from its start as far as the longest
+        # event of every tier, and long events do not make the queries scan
+        # the short ones
+        tiers = {}
+        for position, event in enumerate(self.events):
+            span = ((event.end or event.start) - event.start).days
+            if span < 0:
+                raise ValueError(f"Event ending before its start: {event}")
+            tiers.setdefault(span.bit_length(), []).append((position, event))
+        self.tiers = []
+        for items in tiers.values():
+            span = max((event.end or event.start) - event.start
+                       for position, event in items).days
+            starts = [event.start for position, event in items]
+            self.tiers.append((span, starts, items))
+
+    def __len__(self):
+        return len(self.events)
+
+    def __call__(self, start, end):
+        """
+        Returns the dict of ``Cell`` of the days with events from ``start``
+        to ``end``, both included.
+        """
+        matches = []
+        for span, starts, items in self.tiers:
+            first = datetime.date.fromordinal(max(1, start.toordinal() - span))
+            lo = bisect_left(starts, first)
+            hi = bisect_right(starts, end)
+            matches.extend(item for item in items[lo:hi]
+                           if (item[1].end or item[1].start) >= start)
+        matches.sort(key=lambda item: item[0])
+        result = {}
+        one_day = datetime.timedelta(days=1)
+        for position, event in matches:
+            day = max(event.start, start)
+            last = min(event.end or event.start, end)
+            while day <= last:
+                cell = result.get(day)
+                if cell is None:
+                    result[day] = Cell(event.classes, event.link, event.attrs)
+                else:
+                    classes = list(cell.classes) + list(event.classes)
+                    result[day] = Cell(classes, cell.link or event.link,
+                                       {**cell.attrs, **event.attrs})
+                day += one_day
+        return result
+
+
 def htmlmonth(month, year, classes=nolist, links=nostr, attrs=noattrs,
               th_classes=[], table_classes=[], caltype=0, header="h3",
-              locale=None, safe=False):
-    result = []
-    week_count = 0
-    header = escape(header)
-    month_name = escape(calendar.month_name[month])
-    result.append(f"<{header}>{month_name}</{header}>")
-    if table_classes:
-        cls = ' '.join([escape(c) for c in table_classes])
-        result.append(f'<table class="{cls}">')
-    else:
-        result.append("<table>")
-    result.append(html_week_days(caltype))
-    cal = calendar.Calendar(caltype)
-    for date in cal.itermonthdates(year, month):
-        if date.weekday() == 0:
-            week_count += 1
-            result.append("<tr>\n")
-        if date.month != month:
-            result.append("<td></td>")
-        else:
-            result.append(htmlday(date, classes, links, attrs, safe))
-        if date.weekday() == 6:
-            result.append("</tr>\n")
-    if week_count == 5:
-        result.append(EMPTY_ROW)
-    result.append("</table>\n\n")
-    return "".join([str(x) for x in result])
+              locale=None, safe=False, cells=None, cache=None, version=None,
+              data_dates=False, observer=None, compact=False, padding=True):
+    renderer = get_renderer(caltype, header, tuple(th_classes),
+                            tuple(table_classes), locale, safe, data_dates,
+                            compact, padding)
+    return renderer.render_month(month, year, classes, links, attrs, cells,
+                                 cache, version, observer)
+
+
+def parallel_map(function, items, workers=None, executor=None):
+    """
+    Returns the list of the results of ``function`` for every item, run in
+    ``executor`` or in a new pool of ``workers`` threads if any is given.
+    """
+    if executor is not None:
+        return list(executor.map(function, items))
+    if workers is not None:
+        with ThreadPoolExecutor(workers) as pool:
+            return list(pool.map(function, items))
+    return [function(item) for item in items]
+
+
+def month_bounds(month, year):
+    """
+    Returns the first and the last dates of the month.
+    """
+    last_day = calendar.monthrange(year, month)[1]
+    return datetime.date(year, month, 1), datetime.date(year, month, last_day)
+
+
+def range_bounds(month_list):
+    """
+    Returns the first and the last dates of a list of (month, year) tuples.
+    """
+    first = min(month_list, key=lambda x: (x[1], x[0]))
+    last = max(month_list, key=lambda x: (x[1], x[0]))
+    return month_bounds(*first)[0], month_bounds(*last)[1]
 
 
 def backwards_iterator(starting, months):
@@ -149,13 +1326,23 @@ def htmlcalendar(starting_date,
                  header="h3",
                  locale=None,
                  safe=False,
+                 cells=None,
+                 cache=None,
+                 version=None,
+                 data_dates=False,
+                 observer=None,
+                 compact=False,
+                 padding=True,
+                 workers=None,
+                 executor=None,
                  ):
 
     """
     Main function that takes a starting date and returns a list of
     tables containing months calendars in tables.
 
-    All tables generated have 6 rows, even the last one is empty.
+    All tables generated have 6 rows, even the last one is empty, unless
+    ``padding`` is false.
 
     Parameters
     ----------
@@ -187,25 +1374,884 @@ def htmlcalendar(starting_date,
         Set the locale name used for naming month and week days names
     safe: bool
         If false escapes all variables that go into the templates
+    cells: function
+        A function that takes the first and the last dates of the rendered
+        range and returns a dict mapping dates to ``Cell`` tuples of
+        (classes, link, attrs). It is called only once per calendar and
+        replaces the ``classes``, ``links`` and ``attrs`` callbacks. Days
+        missing from the dict are rendered without formatting.
+    cache: object
+        A month cache like ``LRUCache`` or ``FileCache`` where rendered
+        months are looked up before rendering them.
+    version: string
+        An identifier of the state of the data returned by the callbacks,
+        used with the cache to tell apart months rendered with other data.
+    data_dates: bool
+        If true every day cell gets a ``data-date`` attribute with its ISO
+        date so single cells can be updated from ``CellPatch`` lists.
+    observer: RenderObserver
+        An object like ``RenderStats`` that receives the timings of the
+        callbacks and of every month render.
+    compact: bool
+        If true the tables are rendered without new lines and without the
+        end tags of the empty cells, which browsers do not need.
+    padding: bool
+        If false the months of five weeks are rendered without the empty
+        sixth row.
+    workers: int
+        If given the months are rendered concurrently in a pool of this
+        number of threads. Callbacks must be thread safe.
+    executor: concurrent.futures.Executor
+        A thread pool executor where the months are rendered concurrently,
+        instead of creating one with ``workers``.
     """
 
+    if (cache is None and observer is None and workers is None
+            and executor is None):
+        renderer = get_renderer(caltype, header, tuple(th_classes),
+                                tuple(table_classes), locale, safe,
+                                data_dates, compact, padding)
+        return renderer.render_range(starting_date, months, classes, links,
+                                     attrs, backwards, cells)
+
     iterator = backwards_iterator if backwards else forward_iterator
 
-    if locale is not None:
-        lc.setlocale(lc.LC_ALL, locale)
-        update_weekdays()
+    month_list = list(iterator(starting_date, months - 1))
+    if cells is not None:
+        cells = preloaded_cells(cells, month_list, observer)
+
+    def render(month_year):
+        month, year = month_year
+        return htmlmonth(month,
+                         year,
+                         classes=classes,
+                         links=links,
+                         attrs=attrs,
+                         th_classes=th_classes,
+                         table_classes=table_classes,
+                         caltype=caltype,
+                         header=header,
+                         locale=locale,
+                         safe=safe,
+                         cells=cells,
+                         cache=cache,
+                         version=version,
+                         data_dates=data_dates,
+                         observer=observer,
+                         compact=compact,
+                         padding=padding)
 
+    result = parallel_map(render, month_list, workers, executor)
+    return reversed(result) if backwards else result
+
+
+def iter_htmlcalendar(starting_date,
+                      months=3,
+                      classes=nolist,
+                      links=nostr,
+                      attrs=noattrs,
+                      th_classes=[],
+                      table_classes=[],
+                      caltype=0,
+                      backwards=True,
+                      header="h3",
+                      locale=None,
+                      safe=False,
+                      cells=None,
+                      cache=None,
+                      version=None,
+                      data_dates=False,
+                      observer=None,
+                      compact=False,
+                      padding=True,
+                      ):
+    """
+    Streaming version of ``htmlcalendar`` that yields the month tables one
+    by one in display order, oldest month first, rendering each month only
+    when it is requested. It takes the same parameters as ``htmlcalendar``.
+    """
+
+    iterator = backwards_iterator if backwards else forward_iterator
+
+    month_list = list(iterator(starting_date, months - 1))
+    if backwards:
+        month_list.reverse()
+    if cells is not None:
+        cells = preloaded_cells(cells, month_list, observer)
+
+    for month, year in month_list:
+        yield htmlmonth(month,
+                        year,
+                        classes=classes,
+                        links=links,
+                        attrs=attrs,
+                        th_classes=th_classes,
+                        table_classes=table_classes,
+                        caltype=caltype,
+                        header=header,
+                        locale=locale,
+                        safe=safe,
+                        cells=cells,
+                        cache=cache,
+                        version=version,
+                        data_dates=data_dates,
+                        observer=observer,
+                        compact=compact,
+                        padding=padding)
+
+
+def htmlcalendar_locales(starting_date,
+                         locales,
+                         months=3,
+                         classes=nolist,
+                         links=nostr,
+                         attrs=noattrs,
+                         th_classes=[],
+                         table_classes=[],
+                         caltype=0,
+                         backwards=True,
+                         header="h3",
+                         safe=False,
+                         cells=None,
+                         data_dates=False,
+                         ):
+    """
+    Renders the same calendar in several locales at once and returns a
+    dict mapping every locale of ``locales`` to its list of month tables
+    in display order.
+
+    The callbacks, or the ``cells`` provider, run only once for every day
+    and the day cells are shared by all the locales, that only differ in
+    the names of the months and week days. The rest of parameters are the
+    same as the ones of ``htmlcalendar``.
+    """
+    iterator = backwards_iterator if backwards else forward_iterator
+    month_list = list(iterator(starting_date, months - 1))
+    if backwards:
+        month_list.reverse()
+    renderers = {locale: get_renderer(caltype, header, tuple(th_classes),
+                                      tuple(table_classes), locale, safe,
+                                      data_dates)
+                 for locale in locales}
+    result = {locale: [] for locale in renderers}
+    if not renderers:
+        return result
+    data = None
+    if cells is not None:
+        data = cells(*range_bounds(month_list))
+    first = next(iter(renderers.values()))
+    day_html = first.day_renderer(classes, links, attrs, data)
+    for month, year in month_list:
+        day_cells = first.month_cells(month, year, day_html)
+        for locale, renderer in renderers.items():
+            result[locale].append(renderer.assemble_month(month, year,
+                                                          day_cells))
+    return result
+
+
+class DayModel:
+    """
+    Formatting of a day in a ``CalendarModel``.
+    """
+    __slots__ = ("date", "classes", "link", "attrs")
+
+    def __init__(self, date, classes=(), link="", attrs=None):
+        self.date = date
+        self.classes = tuple(classes) if classes else ()
+        self.link = link or ""
+        self.attrs = attrs or {}
+
+    def __repr__(self):
+        return (f"DayModel({self.date!r}, {self.classes!r}, {self.link!r}, "
+                f"{self.attrs!r})")
+
+    def cell(self):
+        return Cell(self.classes, self.link, self.attrs)
+
+
+class MonthModel:
+    """
+    Month of a ``CalendarModel``. ``days`` holds one item per day of the
+    month, a ``DayModel`` for the days with formatting or else None.
+    """
+    __slots__ = ("month", "year", "days", "caltype")
+
+    def __init__(self, month, year, days, caltype=0):
+        self.month = month
+        self.year = year
+        self.days = days
+        self.caltype = caltype
+
+    def __repr__(self):
+        return f"MonthModel({self.month}, {self.year})"
+
+    @property
+    def weeks(self):
+        """
+        Lists of the seven day numbers of every week, 0 for the days out
+        of the month. Weeks start on monday, or on sunday with caltype 1.
+        """
+        cal = calendar.Calendar(6 if self.caltype else 0)
+        return cal.monthdayscalendar(self.year, self.month)
+
+
+class CalendarModel:
+    """
+    Structured calendar filled by running the callbacks once, that can be
+    serialized into any of the formats of ``SERIALIZERS`` without running
+    them again.
+    """
+    __slots__ = ("months", "caltype")
+
+    def __init__(self, months, caltype=0):
+        self.months = months
+        self.caltype = caltype
+
+    def __repr__(self):
+        return f"CalendarModel({self.months!r})"
+
+    def serialize(self, format="html", **options):
+        """
+        Returns the calendar serialized by the serializer named ``format``
+        in ``SERIALIZERS`` called with the extra ``options``.
+        """
+        return SERIALIZERS[format](self, **options)
+
+
+def build_model(starting_date, months=3, classes=nolist, links=nostr,
+                attrs=noattrs, caltype=0, backwards=True, cells=None):
+    """
+    Returns the ``CalendarModel`` of the calendar with the months in display
+    order, running the callbacks, or the ``cells`` provider once for the
+    whole calendar. Parameters are the same as the ones of
+    ``htmlcalendar``.
+    """
+    iterator = backwards_iterator if backwards else forward_iterator
+    month_list = list(iterator(starting_date, months - 1))
+    if backwards:
+        month_list.reverse()
+    data = None
+    if cells is not None:
+        data = cells(*range_bounds(month_list))
+    values = cell_values(classes, links, attrs, data)
     result = []
+    for month, year in month_list:
+        days = []
+        for day in range(1, calendar.monthrange(year, month)[1] + 1):
+            date = datetime.date(year, month, day)
+            cs, ls, atdict = values(date)
+            if cs or ls or atdict:
+                days.append(DayModel(date, cs, ls, atdict))
+            else:
+                days.append(None)
+        result.append(MonthModel(month, year, days, caltype))
+    return CalendarModel(result, caltype)
+
+
+def model_html(model, renderer=None):
+    """
+    Serializes the model into the list of month tables that
+    ``htmlcalendar`` would return, rendered by ``renderer`` or by the
+    default renderer of the calendar type of the model.
+    """
+    if renderer is None:
+        renderer = get_renderer(model.caltype)
+    elif renderer.caltype != model.caltype:
+        raise ValueError("The renderer and the model calendar types differ")
+    result = []
+    for month in model.months:
+        day_cells = []
+        for number, day in enumerate(month.days, 1):
+            if day is None:
+                date = datetime.date(month.year, month.month, number)
+                day_cells.append(renderer.cell_html(date, EMPTY_CELL))
+            else:
+                day_cells.append(renderer.cell_html(day.date, day.cell()))
+        result.append(renderer.assemble_month(month.month, month.year,
+                                              day_cells))
+    return result
+
+
+def model_bytes(model, renderer=None, encoding="utf-8"):
+    """
+    Serializes the model into the encoded HTML of all its month tables.
+    """
+    return "".join(model_html(model, renderer)).encode(encoding)
+
+
+def model_json(model, **kwargs):
+    """
+    Serializes the model into JSON. Every month has its weeks as lists of
+    day numbers and the list of the days with formatting. Extra keyword
+    arguments are passed to ``json.dumps``.
+    """
+    months = []
+    for month in model.months:
+        days = []
+        for day in month.days:
+            if day is None:
+                continue
+            item = {"date": day.date.isoformat()}
+            if day.classes:
+                item["classes"] = list(day.classes)
+            if day.link:
+                item["link"] = day.link
+            if day.attrs:
+                item["attrs"] = day.attrs
+            days.append(item)
+        months.append({"year": month.year, "month": month.month,
+                       "weeks": month.weeks, "days": days})
+    return json.dumps({"caltype": model.caltype, "months": months}, **kwargs)
+
+
+SERIALIZERS = {
+    "html": model_html,
+    "bytes": model_bytes,
+    "json": model_json,
+}
+
+
+def htmlrange(start_date,
+              end_date=None,
+              weeks=None,
+              classes=nolist,
+              links=nostr,
+              attrs=noattrs,
+              th_classes=[],
+              table_classes=[],
+              caltype=0,
+              locale=None,
+              safe=False,
+              cells=None,
+              data_dates=False,
+              ):
+    """
+    Returns a table with only the weeks of a range of dates, from
+    ``start_date`` to ``end_date``, both included, or to the end of the
+    number of ``weeks`` starting with the week of ``start_date``. Days out
+    of the range are left empty and callbacks are called only for the days
+    in it. The rest of parameters are the same as the ones of
+    ``htmlcalendar``.
+    """
+    renderer = get_renderer(caltype, header="h3",
+                            th_classes=tuple(th_classes),
+                            table_classes=tuple(table_classes),
+                            locale=locale, safe=safe, data_dates=data_dates)
+    if end_date is None:
+        if weeks is None:
+            raise ValueError("Either end_date or weeks must be given")
+        offset = (start_date.weekday() + caltype) % 7
+        end_date = start_date + datetime.timedelta(days=weeks * 7 - 1 -
+                                                   offset)
+    return renderer.render_days(start_date, end_date, classes, links, attrs,
+                                cells)
+
+
+def htmlgrid(starting_date,
+             months=12,
+             columns=3,
+             classes=nolist,
+             links=nostr,
+             attrs=noattrs,
+             th_classes=[],
+             table_classes=[],
+             grid_classes=[],
+             caltype=0,
+             backwards=False,
+             header="h3",
+             locale=None,
+             safe=False,
+             cells=None,
+             data_dates=False,
+             compact=False,
+             padding=True,
+             ):
+    """
+    Returns a single table that lays out the month tables of the calendar
+    in rows of ``columns`` months, oldest month first. The whole range is
+    rendered at once, so callbacks run in a single pass over its dates and
+    a ``cells`` provider is called once. ``grid_classes`` are the classes
+    of the outer table. The rest of parameters are the same as the ones of
+    ``htmlcalendar``, but months go forward by default.
+    """
+    if columns < 1:
+        raise ValueError("columns must be a positive number")
+    renderer = get_renderer(caltype, header, tuple(th_classes),
+                            tuple(table_classes), locale, safe, data_dates,
+                            compact, padding)
+    iterator = backwards_iterator if backwards else forward_iterator
+    month_list = list(iterator(starting_date, months - 1))
+    if backwards:
+        month_list.reverse()
+    return renderer.render_grid(month_list, columns, grid_classes, classes,
+                                links, attrs, cells)
+
+
+def htmlyear(year, columns=3, **kwargs):
+    """
+    Returns the grid of the twelve months of ``year``, see ``htmlgrid``
+    for the rest of parameters.
+    """
+    return htmlgrid(datetime.date(year, 1, 1), months=12, columns=columns,
+                    backwards=False, **kwargs)
+
+
+def calendar_fingerprint(starting_date,
+                         months=3,
+                         th_classes=[],
+                         table_classes=[],
+                         caltype=0,
+                         backwards=True,
+                         header="h3",
+                         locale=None,
+                         safe=False,
+                         data_dates=False,
+                         version=None,
+                         compact=False,
+                         padding=True,
+                         classes=nolist,
+                         links=nostr,
+                         attrs=noattrs,
+                         cells=None,
+                         cache=None,
+                         observer=None,
+                         workers=None,
+                         executor=None,
+                         ):
+    """
+    Returns a stable fingerprint of a calendar, a hexadecimal string that
+    only changes when its configuration, the version of this library or
+    the ``version`` of the data returned by the callbacks change, so it
+    can be used as an HTTP ETag or cache key without rendering anything.
+
+    It takes the same parameters as ``htmlcalendar``, ignoring the ones
+    that do not identify the calendar: the callbacks, the ``cells``
+    provider, the ``cache``, the ``observer`` and the thread pool options.
+    Without a ``locale`` the current time locale of the process is part of
+    the fingerprint, as it names the months.
+    """
+    if locale is None:
+        with LOCALE_LOCK:
+            time_locale = lc.setlocale(lc.LC_TIME)
+    else:
+        time_locale = None
+    config = (__version__, starting_date.year, starting_date.month, months,
+              tuple(th_classes), tuple(table_classes), caltype,
+              bool(backwards), header, locale, bool(safe), bool(data_dates),
+              version)
+    if compact or not padding:
+        config += (bool(compact), bool(padding))
+    if time_locale is not None:
+        config += (time_locale,)
+    return hashlib.sha256(repr(config).encode("utf-8")).hexdigest()
+
+
+def etag_matches(fingerprint, if_none_match):
+    """
+    Returns if the value of an If-None-Match HTTP header matches the
+    fingerprint.
+    """
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag.strip('"') == fingerprint:
+            return True
+    return False
+
+
+def conditional_htmlcalendar(starting_date, if_none_match=None,
+                             version=None, **kwargs):
+    """
+    Returns a tuple of the fingerprint of the calendar and its month
+    tables, or None instead of the tables if the fingerprint matches the
+    ``if_none_match`` header value, so a 304 response can be sent without
+    rendering. Send the fingerprint quoted in the ETag header. The rest of
+    parameters are the same as the ones of ``htmlcalendar``.
+    """
+    fingerprint = calendar_fingerprint(starting_date, version=version,
+                                       **kwargs)
+    if etag_matches(fingerprint, if_none_match):
+        return fingerprint, None
+    return fingerprint, htmlcalendar(starting_date, version=version,
+                                     **kwargs)
+
+
+def write_htmlcalendar(fp, starting_date, encoding="utf-8", **kwargs):
+    """
+    Writes the calendar month by month into the file like object ``fp``.
+
+    Binary streams, the ``io`` raw and buffered ones or the ones opened in
+    a mode with "b", receive the month tables encoded with ``encoding`` and
+    any other stream receives strings. The rest of parameters are the same
+    as the ones of ``htmlcalendar``.
+    """
+    mode = getattr(fp, "mode", "")
+    binary = (isinstance(fp, (io.RawIOBase, io.BufferedIOBase)) or
+              isinstance(mode, str) and "b" in mode)
+    for chunk in iter_htmlcalendar(starting_date, **kwargs):
+        fp.write(chunk.encode(encoding) if binary else chunk)
+
+
+DEFAULT_CELL_SIZE = 256
+
+
+def estimate_size(starting_date, months=3, backwards=True, renderer=None,
+                  cell_size=DEFAULT_CELL_SIZE):
+    """
+    Returns an estimate of the size in bytes of the UTF-8 encoded calendar
+    to allocate buffers for ``render_into`` up front. It is an upper bound
+    only if no day cell takes more than ``cell_size`` bytes. The static
+    parts of the tables are measured exactly with ``renderer``, by default
+    the one of the default configuration.
+    """
+    if renderer is None:
+        renderer = get_renderer()
+    iterator = backwards_iterator if backwards else forward_iterator
+    head = len(renderer.table_head.encode("utf-8"))
+    result = 0
     for month, year in iterator(starting_date, months - 1):
-        result.append(htmlmonth(month,
-                                year,
-                                classes=classes,
-                                links=links,
-                                attrs=attrs,
-                                th_classes=th_classes,
-                                table_classes=table_classes,
-                                caltype=caltype,
-                                header=header,
-                                locale=locale,
-                                safe=safe))
-    return reversed(result) if backwards else result
+        skeleton = month_skeleton(year, month, renderer.caltype,
+                                  renderer.compact, renderer.padding)
+        result += len(renderer.month_headers[month].encode("utf-8")) + head
+        result += sum(len(fragment) for fragment in skeleton)
+        result += (len(skeleton) - 1) * cell_size
+    return result
+
+
+def render_into(buffer, starting_date, encoding="utf-8", **kwargs):
+    """
+    Renders the calendar month by month straight into ``buffer`` as
+    encoded bytes and returns the number of bytes written.
+
+    ``buffer`` can be a ``bytearray``, that is extended, a writable
+    ``memoryview``, filled from its start, or any binary file like object.
+    A memoryview is only written if the whole calendar fits in it, else a
+    ``ValueError`` is raised, see ``estimate_size``. The rest of parameters
+    are the same as the ones of ``htmlcalendar``.
+    """
+    written = 0
+    if isinstance(buffer, memoryview):
+        view = buffer.cast("B")
+        chunks = [chunk.encode(encoding)
+                  for chunk in iter_htmlcalendar(starting_date, **kwargs)]
+        if sum(len(data) for data in chunks) > len(view):
+            raise ValueError("Buffer too small for the calendar")
+        for data in chunks:
+            end = written + len(data)
+            view[written:end] = data
+            written = end
+    elif isinstance(buffer, bytearray):
+        for chunk in iter_htmlcalendar(starting_date, **kwargs):
+            data = chunk.encode(encoding)
+            buffer += data
+            written += len(data)
+    else:
+        for chunk in iter_htmlcalendar(starting_date, **kwargs):
+            data = chunk.encode(encoding)
+            buffer.write(data)
+            written += len(data)
+    return written
+
+
+def htmlcalendar_bytes(starting_date, encoding="utf-8", **kwargs):
+    """
+    Returns the whole calendar as encoded bytes ready to be sent. The rest
+    of parameters are the same as the ones of ``htmlcalendar``.
+    """
+    return b"".join([chunk.encode(encoding)
+                     for chunk in iter_htmlcalendar(starting_date, **kwargs)])
+
+
+ZDICT = "".join(
+    ["</table>\n\n", "<tr>\n", 6 * "<td>", 6 * "<td></td>", "</tr>\n",
+     "</tr><tr>", EMPTY_ROW, COMPACT_EMPTY_ROW] + DAY_CELLS[31:0:-1]
+).encode("utf-8")
+
+
+def htmlcalendar_gzip(starting_date, compresslevel=6, encoding="utf-8",
+                      **kwargs):
+    """
+    Returns the whole calendar as gzip compressed bytes ready to be sent
+    with a ``Content-Encoding: gzip`` header. Months are compressed as
+    they are rendered. The rest of parameters are the same as the ones of
+    ``htmlcalendar``.
+    """
+    compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, 31)
+    result = [compressor.compress(chunk.encode(encoding))
+              for chunk in iter_htmlcalendar(starting_date, **kwargs)]
+    result.append(compressor.flush())
+    return b"".join(result)
+
+
+def compress_calendar(data, level=6):
+    """
+    Returns the HTML of a calendar, as bytes, compressed in zlib format
+    with ``ZDICT``, a dictionary of the fragments repeated in every table,
+    so even single months compress well. Meant for storage, HTTP clients
+    cannot decompress it. Use ``decompress_calendar`` to get it back.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 15, zdict=ZDICT)
+    return compressor.compress(data) + compressor.flush()
+
+
+def decompress_calendar(data):
+    """
+    Returns the bytes compressed with ``compress_calendar``.
+    """
+    decompressor = zlib.decompressobj(15, zdict=ZDICT)
+    return decompressor.decompress(data) + decompressor.flush()
+
+
+async def ahtmlmonth(month, year, classes=nolist, links=nostr,
+                     attrs=noattrs, th_classes=[], table_classes=[],
+                     caltype=0, header="h3", locale=None, safe=False,
+                     cells=None, cache=None, version=None, data_dates=False,
+                     concurrency=None):
+    """
+    Coroutine version of ``htmlmonth`` that accepts coroutine functions as
+    callbacks and ``cells`` provider. The callbacks of the days are awaited
+    concurrently, at most ``concurrency`` days at a time if given.
+    """
+    renderer = get_renderer(caltype, header, tuple(th_classes),
+                            tuple(table_classes), locale, safe, data_dates)
+    semaphore = None
+    if concurrency is not None:
+        semaphore = asyncio.Semaphore(concurrency)
+    return await renderer.arender_month(month, year, classes, links, attrs,
+                                        cells, cache, version, semaphore)
+
+
+async def ahtmlcalendar(starting_date,
+                        months=3,
+                        classes=nolist,
+                        links=nostr,
+                        attrs=noattrs,
+                        th_classes=[],
+                        table_classes=[],
+                        caltype=0,
+                        backwards=True,
+                        header="h3",
+                        locale=None,
+                        safe=False,
+                        cells=None,
+                        cache=None,
+                        version=None,
+                        data_dates=False,
+                        concurrency=None,
+                        ):
+    """
+    Coroutine version of ``htmlcalendar`` that accepts coroutine functions
+    as callbacks and ``cells`` provider and returns the list of month
+    tables in display order.
+
+    The callbacks of the days of all the months are awaited concurrently,
+    at most ``concurrency`` days at a time if given. The ``cells``
+    provider is awaited once for the whole calendar. The rest of
+    parameters are the same as the ones of ``htmlcalendar``.
+    """
+    iterator = backwards_iterator if backwards else forward_iterator
+    month_list = list(iterator(starting_date, months - 1))
+    if backwards:
+        month_list.reverse()
+    renderer = get_renderer(caltype, header, tuple(th_classes),
+                            tuple(table_classes), locale, safe, data_dates)
+    semaphore = None
+    if concurrency is not None:
+        semaphore = asyncio.Semaphore(concurrency)
+    preloaded = None
+    if cells is not None:
+        preloaded = fixed_cells(
+            await resolve(cells(*range_bounds(month_list))))
+    return await asyncio.gather(*[
+        renderer.arender_month(month, year, classes, links, attrs, preloaded,
+                               cache, version, semaphore)
+        for month, year in month_list
+    ])
+
+
+JOB_OPTIONS = ["months", "th_classes", "table_classes", "caltype",
+               "backwards", "header", "locale", "safe", "data_dates"]
+
+
+def read_jobs(fp, format="jsonl"):
+    """
+    Yields the render jobs read from the text file ``fp`` as dicts.
+
+    In "jsonl" format every line is a JSON object. In "csv" format the
+    first row names the columns, class lists are separated by spaces and
+    the events column holds a JSON list. Every job has an ``id`` used as
+    the name of its output file, a ``starting_date`` in ISO format, an
+    optional list of ``events`` as accepted by ``EventIndex`` with dates
+    in ISO format and optionally any of the options of ``htmlcalendar``
+    named in ``JOB_OPTIONS``.
+    """
+    if format == "jsonl":
+        for line in fp:
+            if line.strip():
+                yield json.loads(line)
+    elif format == "csv":
+        for row in csv.DictReader(fp):
+            job = {k: v for k, v in row.items() if v not in (None, "")}
+            for key in ("months", "caltype"):
+                if key in job:
+                    job[key] = int(job[key])
+            for key in ("backwards", "safe", "data_dates"):
+                if key in job:
+                    job[key] = job[key].lower() in ("1", "true", "yes")
+            for key in ("th_classes", "table_classes"):
+                if key in job:
+                    job[key] = job[key].split()
+            if "events" in job:
+                job["events"] = json.loads(job["events"])
+            yield job
+    else:
+        raise ValueError(f"Unknown jobs format '{format}'")
+
+
+def job_path(directory, job):
+    """
+    Returns the path of the output file of the job.
+    """
+    name = str(job["id"])
+    if not name or name in (".", "..") or os.sep in name or "/" in name:
+        raise ValueError(f"Invalid job id '{name}'")
+    return os.path.join(directory, name + ".html")
+
+
+def render_job(job):
+    """
+    Returns the HTML of the calendar of a render job.
+    """
+    events = []
+    for event in job.get("events", []):
+        event = list(event)
+        event[0] = datetime.date.fromisoformat(event[0])
+        if len(event) > 1 and event[1]:
+            event[1] = datetime.date.fromisoformat(event[1])
+        events.append(event)
+    options = {k: v for k, v in job.items() if k in JOB_OPTIONS}
+    starting_date = datetime.date.fromisoformat(job["starting_date"])
+    return "".join(htmlcalendar(starting_date, cells=EventIndex(events),
+                                **options))
+
+
+def write_atomic(path, text, encoding="utf-8"):
+    """
+    Writes the file through a temporary file in the same directory that
+    replaces it once complete, so it never is found half written.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".",
+                               suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding=encoding) as fp:
+            fp.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def bulk_worker(args):
+    directory, job = args
+    write_atomic(job_path(directory, job), render_job(job))
+    return job["id"]
+
+
+def render_jobs(jobs, directory, processes=None, chunksize=64, resume=False,
+                progress=None):
+    """
+    Renders the calendars of the ``jobs`` into files in ``directory``.
+
+    Jobs are distributed in chunks of ``chunksize`` among a pool of
+    ``processes`` processes, by default one per CPU, or rendered in this
+    process if ``processes`` is 1. Every worker process keeps its own
+    renderers, so the static parts of the tables are shared by all the
+    jobs it renders. Files are written atomically, so with ``resume`` the
+    jobs whose file already exists are skipped to restart a failed run.
+    ``progress`` is called with the number of rendered calendars after
+    each one.
+
+    Returns a dict with the number of calendars rendered and skipped and
+    the seconds it took.
+    """
+    os.makedirs(directory, exist_ok=True)
+    skipped = 0
+
+    def pending():
+        nonlocal skipped
+        for job in jobs:
+            if resume and os.path.exists(job_path(directory, job)):
+                skipped += 1
+                continue
+            yield directory, job
+
+    start = time.perf_counter()
+    rendered = 0
+    if processes == 1:
+        results = map(bulk_worker, pending())
+        pool = None
+    else:
+        pool = multiprocessing.Pool(processes)
+        results = pool.imap_unordered(bulk_worker, pending(), chunksize)
+    try:
+        for _ in results:
+            rendered += 1
+            if progress is not None:
+                progress(rendered)
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+    return {"rendered": rendered, "skipped": skipped,
+            "seconds": time.perf_counter() - start}
+
+
+def main(argv=None):
+    """
+    Command line entry point that renders calendars in bulk from a file of
+    jobs, see ``read_jobs`` and ``render_jobs``.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m htmlcalendar",
+        description="Renders HTML calendars in bulk from a JSONL or CSV "
+                    "file of jobs into a directory.")
+    parser.add_argument("jobs", help="jobs file, - for standard input")
+    parser.add_argument("directory", help="output directory")
+    parser.add_argument("--format", choices=["jsonl", "csv"],
+                        help="jobs format, guessed from the file extension "
+                             "by default")
+    parser.add_argument("--processes", type=int,
+                        help="number of worker processes, one per CPU by "
+                             "default")
+    parser.add_argument("--chunksize", type=int, default=64,
+                        help="jobs sent to a worker at a time")
+    parser.add_argument("--resume", action="store_true",
+                        help="skip the jobs whose output file exists")
+    args = parser.parse_args(argv)
+
+    format = args.format
+    if format is None:
+        format = "csv" if args.jobs.endswith(".csv") else "jsonl"
+    if args.jobs == "-":
+        fp = contextlib.nullcontext(sys.stdin)
+    else:
+        fp = open(args.jobs, newline="", encoding="utf-8")
+    with fp as fp:
+        result = render_jobs(read_jobs(fp, format), args.directory,
+                             processes=args.processes,
+                             chunksize=args.chunksize, resume=args.resume)
+    seconds = result["seconds"]
+    rate = result["rendered"] / seconds if seconds else 0
+    print(f"Rendered {result['rendered']} calendars, skipped "
+          f"{result['skipped']}, in {seconds:.2f} s ({rate:.1f}/s)",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
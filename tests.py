@@ -1,8 +1,18 @@
 from datetime import date
 import calendar
 import unittest
-from unittest.mock import patch, Mock, call
+from unittest.mock import patch, Mock, call, ANY
 from typing import Tuple, List
+import asyncio
+import io
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import locale as lc
+import os
+import tempfile
+import gzip
+import zlib
 from html.parser import HTMLParser
 from htmlcalendar import (htmlcalendar,
                           htmlday,
@@ -12,6 +22,10 @@ from htmlcalendar import (htmlcalendar,
                           nolist,
                           nostr,
                           noattrs,
+                          CalendarRenderer,
+                          Cell,
+                          iter_htmlcalendar,
+                          write_htmlcalendar,
                           )
 import htmlcalendar as hc
 
@@ -440,9 +454,11 @@ class WhiteBoxHtmlCalendar1TestCase(unittest.TestCase):
         self.attrs = Mock()
         self.th_classes = Mock()
         self.table_classes = Mock()
+        self.cache = Mock()
 
     @patch('htmlcalendar.htmlmonth')
     def test_months(self, month_mock):
+        # Months are rendered one by one when a cache is given
         result = htmlcalendar(self.starting_date,
                               months=self.months,
                               classes=self.classes,
@@ -454,7 +470,8 @@ class WhiteBoxHtmlCalendar1TestCase(unittest.TestCase):
                               backwards=self.backwards,
                               header=self.header,
                               locale=self.locale,
-                              safe=self.safe)
+                              safe=self.safe,
+                              cache=self.cache)
 
         # Sanity call check
         for item in result:
@@ -478,11 +495,44 @@ class WhiteBoxHtmlCalendar1TestCase(unittest.TestCase):
                      caltype=self.caltype,
                      header=self.header,
                      locale=self.locale,
-                     safe=self.safe)
+                     safe=self.safe,
+                     cells=None,
+                     cache=self.cache,
+                     version=None,
+                     data_dates=False,
+                     observer=None,
+                     compact=False,
+                     padding=True)
             calls.append(c)
         self.assertEqual(len(month_mock.call_args_list), len(calls))
         self.assertListEqual(month_mock.call_args_list, calls)
 
+    @patch('htmlcalendar.htmlmonth')
+    @patch('htmlcalendar.get_renderer')
+    def test_range(self, renderer_mock, month_mock):
+        # Without cache, observer or pool the range is rendered at once
+        result = htmlcalendar(self.starting_date,
+                              months=self.months,
+                              classes=self.classes,
+                              links=self.links,
+                              attrs=self.attrs,
+                              th_classes=["thclass"],
+                              table_classes=["tableclass"],
+                              caltype=self.caltype,
+                              backwards=self.backwards,
+                              header=self.header,
+                              locale=self.locale,
+                              safe=self.safe)
+        self.assertFalse(month_mock.called)
+        renderer_mock.assert_called_once_with(
+            self.caltype, self.header, ("thclass",), ("tableclass",),
+            self.locale, self.safe, False, False, True)
+        render_range = renderer_mock.return_value.render_range
+        render_range.assert_called_once_with(
+            self.starting_date, self.months, self.classes, self.links,
+            self.attrs, self.backwards, None)
+        self.assertIs(result, render_range.return_value)
+
 
 class WhiteBoxHtmlCalendar2TestCase(WhiteBoxHtmlCalendar1TestCase):
     starting_date = date(2025, 9, 1)
@@ -534,5 +584,1168 @@ class BlackBoxHtmlCalendarTestCase(unittest.TestCase):
         self.assertEqual(month_counter, self.months)
 
 
+class RendererTestCase(unittest.TestCase):
+    starting_date = date(2015, 2, 1)
+    expected = (
+        '<h3>February</h3><table class="t"><tr><th></th><th></th><th></th>'
+        '<th></th><th></th><th></th><th></th></tr>\n<tr>\n<td></td><td></td>'
+        '<td></td><td></td><td></td><td></td><td>1</td></tr>\n<tr>\n'
+        '<td>2</td><td data-x="&quot;" class="a&amp;lt;b">3</td>'
+        '<td><a href="/x?a=1&amp;b=2">4</a></td><td data-x="&quot;">5</td>'
+        '<td>6</td><td>7</td><td>8</td></tr>\n<tr>\n<td>9</td><td>10</td>'
+        '<td>11</td><td>12</td><td>13</td><td>14</td><td>15</td></tr>\n'
+        '<tr>\n<td>16</td><td>17</td><td>18</td><td>19</td><td>20</td>'
+        '<td>21</td><td>22</td></tr>\n<tr>\n<td>23</td><td>24</td><td>25</td>'
+        '<td>26</td><td>27</td><td>28</td><td></td></tr>\n<tr>'
+        + 7 * '<td>&nbsp;</td>' + '</tr></table>\n\n'
+    )
+
+    def classes(self, date):
+        return ['a<b'] if date.day == 3 else []
+
+    def links(self, date):
+        return '/x?a=1&b=2' if date.day == 4 else ''
+
+    def attrs(self, date):
+        return {'data-x': '"'} if date.day in (3, 5) else {}
+
+    def test_render_month(self):
+        renderer = CalendarRenderer(table_classes=['t'])
+        html = renderer.render_month(2, 2015, self.classes, self.links,
+                                     self.attrs)
+        self.assertEqual(html, self.expected)
+
+    def test_htmlmonth(self):
+        html = htmlmonth(2, 2015, self.classes, self.links, self.attrs,
+                         table_classes=['t'])
+        self.assertEqual(html, self.expected)
+
+    def test_render_range(self):
+        renderer = CalendarRenderer(caltype=1, safe=True)
+        for backwards in (True, False):
+            result = renderer.render_range(self.starting_date, months=14,
+                                           classes=self.classes,
+                                           backwards=backwards)
+            expected = htmlcalendar(self.starting_date, months=14,
+                                    classes=self.classes, caltype=1,
+                                    backwards=backwards, safe=True)
+            self.assertListEqual(result, list(expected))
+
+    def test_shared_renderer(self):
+        self.assertIs(hc.get_renderer(0, "h3", ("t",)),
+                      hc.get_renderer(0, "h3", ("t",)))
+
+
+class CellsTestCase(unittest.TestCase):
+    starting_date = date(2024, 3, 15)
+    months = 3
+
+    def setUp(self):
+        self.calls = []
+
+    def cells(self, start, end):
+        self.calls.append((start, end))
+        return {date(2024, 1, 31): Cell(["a"], "/a", {"x": "1"}),
+                date(2024, 2, 29): Cell(classes=["b"]),
+                date(2024, 3, 1): Cell(link="/c")}
+
+    def classes(self, date):
+        return self.cells(None, None).get(date, Cell()).classes
+
+    def links(self, date):
+        return self.cells(None, None).get(date, Cell()).link
+
+    def attrs(self, date):
+        return self.cells(None, None).get(date, Cell()).attrs
+
+    def test_htmlcalendar(self):
+        for backwards in (True, False):
+            self.calls = []
+            result = list(htmlcalendar(self.starting_date, self.months,
+                                       cells=self.cells,
+                                       backwards=backwards))
+            self.assertEqual(len(self.calls), 1)
+            expected = list(htmlcalendar(self.starting_date, self.months,
+                                         classes=self.classes,
+                                         links=self.links,
+                                         attrs=self.attrs,
+                                         backwards=backwards))
+            self.assertListEqual(result, expected)
+        self.assertEqual(self.calls[0], (date(2024, 3, 1), date(2024, 5, 31)))
+
+    def test_htmlmonth(self):
+        html = htmlmonth(2, 2024, cells=self.cells)
+        self.assertEqual(self.calls, [(date(2024, 2, 1), date(2024, 2, 29))])
+        self.assertIn('<td class="b">29</td>', html)
+        self.assertNotIn('/a', html)
+
+    def test_render_range(self):
+        renderer = CalendarRenderer()
+        result = renderer.render_range(date(2024, 1, 1), 3, cells=self.cells,
+                                       backwards=False)
+        self.assertEqual(len(self.calls), 1)
+        self.assertIn('<td x="1" class="a"><a href="/a">31</a></td>',
+                      result[0])
+        self.assertIn('<td><a href="/c">1</a></td>', result[2])
+
+
+class StreamingTestCase(unittest.TestCase):
+    starting_date = date(2024, 3, 15)
+    months = 14
+
+    def classes(self, date):
+        return ["odd"] if date.day % 2 else []
+
+    def test_iter(self):
+        for backwards in (True, False):
+            expected = list(htmlcalendar(self.starting_date, self.months,
+                                         classes=self.classes,
+                                         backwards=backwards))
+            result = iter_htmlcalendar(self.starting_date, self.months,
+                                       classes=self.classes,
+                                       backwards=backwards)
+            self.assertListEqual(list(result), expected)
+
+    @patch('htmlcalendar.htmlmonth')
+    def test_lazy(self, month_mock):
+        result = iter_htmlcalendar(self.starting_date, self.months)
+        self.assertFalse(month_mock.called)
+        next(result)
+        self.assertEqual(month_mock.call_count, 1)
+        self.assertEqual(month_mock.call_args[0][:2], (2, 2023))
+
+    def test_write(self):
+        expected = "".join(htmlcalendar(self.starting_date, self.months))
+        text = io.StringIO()
+        write_htmlcalendar(text, self.starting_date, months=self.months)
+        self.assertEqual(text.getvalue(), expected)
+        binary = io.BytesIO()
+        write_htmlcalendar(binary, self.starting_date, months=self.months)
+        self.assertEqual(binary.getvalue(), expected.encode("utf-8"))
+        for mode, data in (("w+", expected), ("w+b", expected.encode())):
+            with tempfile.SpooledTemporaryFile(mode=mode) as fp:
+                write_htmlcalendar(fp, self.starting_date,
+                                   months=self.months)
+                fp.seek(0)
+                self.assertEqual(fp.read(), data)
+
+
+class LocaleTestCase(unittest.TestCase):
+    starting_date = date(2024, 1, 15)
+    locale = "C"
+
+    def test_names(self):
+        names = hc.locale_names(self.locale)
+        self.assertIs(names, hc.locale_names(self.locale))
+        self.assertEqual(names.month_names[1], "January")
+        self.assertEqual(names.weekdays0[0], "Mon")
+        self.assertEqual(names.weekdays1[0], "Sun")
+
+    def test_process_locale_untouched(self):
+        previous = lc.setlocale(lc.LC_ALL)
+        result = "".join(htmlcalendar(self.starting_date, months=1,
+                                      locale=self.locale))
+        self.assertEqual(lc.setlocale(lc.LC_ALL), previous)
+        self.assertIn("<h3>January</h3>", result)
+        self.assertIn("<tr><th>Mon</th><th>Tue</th>", result)
+
+    def test_sunday_first(self):
+        result = htmlmonth(1, 2024, caltype=1, locale=self.locale)
+        self.assertIn("<tr><th>Sun</th><th>Mon</th>", result)
+
+    def test_default_names_locked(self):
+        # Renderers without locale wait for locale_names to restore the
+        # process locale before reading the names
+        thread = threading.Thread(target=hc.get_renderer,
+                                  kwargs={"header": "h6"})
+        with hc.LOCALE_LOCK:
+            thread.start()
+            thread.join(0.05)
+            self.assertTrue(thread.is_alive())
+        thread.join()
+        self.assertFalse(thread.is_alive())
+
+    def test_default_names_follow_locale(self):
+        self.assertIn("<h3>March</h3>", htmlmonth(3, 2024))
+        names = ["", "enero", "febrero", "marzo"] + 9 * ["mes"]
+        with patch("htmlcalendar.lc.setlocale", return_value="es_ES.UTF-8"), \
+                patch("calendar.month_name", names):
+            self.assertIn("<h3>marzo</h3>", htmlmonth(3, 2024))
+        self.assertIn("<h3>March</h3>", htmlmonth(3, 2024))
+
+
+class LRUCacheTestCase(unittest.TestCase):
+    def test_eviction(self):
+        cache = hc.LRUCache(maxsize=2)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")
+        cache.set("c", "3")
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get("a"), "1")
+        self.assertIsNone(cache.get("b"))
+
+    @patch('htmlcalendar.time.monotonic')
+    def test_ttl(self, monotonic):
+        cache = hc.LRUCache(ttl=10)
+        monotonic.return_value = 100
+        cache.set("a", "1")
+        monotonic.return_value = 105
+        self.assertEqual(cache.get("a"), "1")
+        monotonic.return_value = 111
+        self.assertIsNone(cache.get("a"))
+
+
+class MonthCacheTestCase(unittest.TestCase):
+    starting_date = date(2024, 3, 15)
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.classes = Mock(return_value=["x"])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def check_cache(self, cache):
+        expected = list(htmlcalendar(self.starting_date,
+                                     classes=self.classes))
+        self.classes.reset_mock()
+        first = list(htmlcalendar(self.starting_date, classes=self.classes,
+                                  cache=cache, version="1"))
+        calls = self.classes.call_count
+        second = list(htmlcalendar(self.starting_date, classes=self.classes,
+                                   cache=cache, version="1"))
+        self.assertListEqual(first, expected)
+        self.assertListEqual(second, expected)
+        self.assertEqual(self.classes.call_count, calls)
+        list(htmlcalendar(self.starting_date, classes=self.classes,
+                          cache=cache, version="2"))
+        self.assertEqual(self.classes.call_count, 2 * calls)
+
+    def test_lru(self):
+        self.check_cache(hc.LRUCache())
+
+    def test_file(self):
+        self.check_cache(hc.FileCache(self.tmp.name))
+        self.assertEqual(len(os.listdir(self.tmp.name)), 6)
+        shared = hc.FileCache(self.tmp.name)
+        html = htmlmonth(3, 2024, classes=self.classes, cache=shared,
+                         version="1")
+        self.assertIn('class="x"', html)
+
+    def test_file_prune(self):
+        cache = hc.FileCache(self.tmp.name, maxsize=2)
+        for key in "abc":
+            cache.set(key, key)
+        cache.prune()
+        self.assertEqual(len(os.listdir(self.tmp.name)), 2)
+        cache.clear()
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_file_prune_ttl(self):
+        cache = hc.FileCache(self.tmp.name, ttl=10)
+        for i in range(cache.prune_every - 1):
+            cache.set(str(i), "x")
+            mtime = os.path.getmtime(cache.path(str(i))) - 11
+            os.utime(cache.path(str(i)), (mtime, mtime))
+        cache.set("last", "x")
+        self.assertEqual(os.listdir(self.tmp.name),
+                         [os.path.basename(cache.path("last"))])
+
+
+class CalendarStateTestCase(unittest.TestCase):
+    starting_date = date(2024, 3, 15)
+    months = 4
+
+    def setUp(self):
+        self.booked = {date(2024, 2, 10)}
+        self.classes = Mock(side_effect=self.booked_classes)
+
+    def booked_classes(self, date):
+        return ["booked"] if date in self.booked else []
+
+    def expected(self):
+        return list(htmlcalendar(self.starting_date, self.months,
+                                 classes=self.booked_classes))
+
+    def test_update(self):
+        renderer = CalendarRenderer()
+        state = renderer.render_state(self.starting_date, self.months,
+                                      classes=self.classes)
+        self.assertListEqual(state.html(), self.expected())
+        self.classes.reset_mock()
+        self.booked.add(date(2024, 3, 1))
+        self.booked.discard(date(2024, 2, 10))
+        result = state.update([date(2024, 3, 1), date(2024, 2, 10),
+                               date(2030, 1, 1)])
+        self.assertListEqual(result, self.expected())
+        self.assertEqual(self.classes.call_count, 2)
+
+    def test_update_cells(self):
+        data = {date(2024, 1, 5): Cell(["a"])}
+        provider = Mock(side_effect=lambda start, end: dict(data))
+        renderer = CalendarRenderer()
+        state = renderer.render_state(self.starting_date, self.months,
+                                      cells=provider)
+        data[date(2024, 1, 6)] = Cell(["b"])
+        result = state.update([date(2024, 1, 6)])
+        provider.assert_called_with(date(2024, 1, 6), date(2024, 1, 6))
+        self.assertIn('<td class="b">6</td>', result[1])
+        self.assertIn('<td class="a">5</td>', result[1])
+
+
+class CellPatchTestCase(unittest.TestCase):
+    starting_date = date(2024, 3, 15)
+
+    def setUp(self):
+        self.links = {}
+
+    def link(self, date):
+        return self.links.get(date, "")
+
+    def test_data_dates(self):
+        html = htmlmonth(3, 2024, links=self.link, data_dates=True)
+        self.assertIn('<td data-date="2024-03-09">9</td>', html)
+        self.assertIn("<td></td>", html)
+        html_sanity_checker(html)
+
+    def test_patch(self):
+        renderer = CalendarRenderer(data_dates=True)
+        state = renderer.render_state(self.starting_date, links=self.link)
+        self.links[date(2024, 2, 2)] = "/b"
+        patches = state.patch([date(2024, 2, 2), date(2024, 2, 3)])
+        self.assertEqual(len(patches), 1)
+        patch = patches[0]
+        self.assertEqual(patch.date, date(2024, 2, 2))
+        self.assertEqual(patch.link, "/b")
+        self.assertEqual(patch.html,
+                         '<td data-date="2024-02-02"><a href="/b">2</a></td>')
+        expected = htmlcalendar(self.starting_date, links=self.link,
+                                data_dates=True)
+        self.assertListEqual(state.html(), list(expected))
+        self.assertEqual(state.patch([date(2024, 2, 2)]), [])
+
+
+class CellDefaultsTestCase(unittest.TestCase):
+    def test_shared_attrs(self):
+        for tuple_type in (Cell, lambda: hc.Event(date(2024, 3, 1))):
+            with self.assertRaises(TypeError):
+                tuple_type().attrs["x"] = "1"
+            self.assertEqual(tuple_type().attrs, {})
+        self.assertEqual(hc.htmlcell(2, *Cell(), False), "<td>2</td>")
+
+
+class EventIndexTestCase(unittest.TestCase):
+    starting_date = date(2024, 3, 15)
+    events = [
+        (date(2024, 1, 30), date(2024, 2, 2), ["trip"], "/trip"),
+        (date(2024, 2, 1), None, ["party"], "/party", {"title": "Party"}),
+        hc.Event(date(2023, 11, 1), date(2024, 5, 1), ["season"]),
+        hc.Event(date(2024, 3, 31), attrs={"title": "Easter"}),
+        hc.Event(date(2025, 1, 1), classes=["future"]),
+    ]
+
+    def brute_force(self, start, end):
+        result = {}
+        events = sorted([hc.Event(*e) for e in self.events],
+                        key=lambda e: e.start)
+        for event in events:
+            day = event.start
+            while day <= (event.end or event.start):
+                if start <= day <= end:
+                    cell = result.get(day, Cell([], "", {}))
+                    result[day] = Cell(cell.classes + list(event.classes),
+                                       cell.link or event.link,
+                                       {**cell.attrs, **event.attrs})
+                day = date.fromordinal(day.toordinal() + 1)
+        return result
+
+    def test_query(self):
+        index = hc.EventIndex(self.events)
+        self.assertEqual(len(index), 5)
+        start, end = date(2024, 1, 1), date(2024, 3, 31)
+        result = index(start, end)
+        self.assertEqual(result, self.brute_force(start, end))
+        self.assertEqual(result[date(2024, 2, 1)],
+                         Cell(["season", "trip", "party"], "/trip",
+                              {"title": "Party"}))
+        self.assertEqual(index(date(2030, 1, 1), date(2030, 2, 1)), {})
+
+    def test_long_events(self):
+        events = self.events + [
+            (date(2014, 1, 1), date(2034, 1, 1), ["decades"]),
+            (date(2024, 3, 9), date(2024, 3, 12), ["week"]),
+        ]
+        index = hc.EventIndex(events)
+        with patch.object(self, "events", events):
+            for start, end in ((date(2024, 1, 1), date(2024, 3, 31)),
+                               (date(2024, 3, 12), date(2024, 3, 12)),
+                               (date(2034, 1, 1), date(2034, 2, 1))):
+                self.assertEqual(index(start, end),
+                                 self.brute_force(start, end))
+
+    def test_end_before_start(self):
+        with self.assertRaises(ValueError):
+            hc.EventIndex([(date(2024, 3, 2), date(2024, 3, 1))])
+
+    def test_htmlcalendar(self):
+        index = hc.EventIndex(self.events)
+        result = list(htmlcalendar(self.starting_date, cells=index))
+        expected = list(htmlcalendar(self.starting_date,
+                                     cells=self.brute_force))
+        self.assertListEqual(result, expected)
+        self.assertIn('<td title="Easter" class="season">31</td>', result[2])
+
+
+class AsyncTestCase(unittest.TestCase):
+    starting_date = date(2024, 3, 15)
+    months = 3
+
+    def setUp(self):
+        self.running = 0
+        self.max_running = 0
+
+    def classes(self, date):
+        return ["odd"] if date.day % 2 else []
+
+    def links(self, date):
+        return f"/{date.day}" if date.day % 3 else ""
+
+    async def aclasses(self, date):
+        self.running += 1
+        self.max_running = max(self.running, self.max_running)
+        await asyncio.sleep(0)
+        self.running -= 1
+        return self.classes(date)
+
+    async def alinks(self, date):
+        await asyncio.sleep(0)
+        return self.links(date)
+
+    def test_ahtmlcalendar(self):
+        for backwards in (True, False):
+            expected = list(htmlcalendar(self.starting_date, self.months,
+                                         classes=self.classes,
+                                         links=self.links,
+                                         backwards=backwards))
+            result = asyncio.run(hc.ahtmlcalendar(self.starting_date,
+                                                  self.months,
+                                                  classes=self.aclasses,
+                                                  links=self.alinks,
+                                                  backwards=backwards))
+            self.assertListEqual(result, expected)
+        self.assertGreater(self.max_running, 28)
+
+    def test_concurrency(self):
+        result = asyncio.run(hc.ahtmlmonth(3, 2024, classes=self.aclasses,
+                                           links=self.links, concurrency=4))
+        self.assertEqual(result, htmlmonth(3, 2024, classes=self.classes,
+                                           links=self.links))
+        self.assertEqual(self.max_running, 4)
+
+    def test_cells(self):
+        async def cells(start, end):
+            return {date(2024, 2, 2): Cell(["x"])}
+        result = asyncio.run(hc.ahtmlcalendar(self.starting_date,
+                                              self.months, cells=cells))
+        self.assertIn('<td class="x">2</td>', result[1])
+
+
+class RenderStatsTestCase(unittest.TestCase):
+    starting_date = date(2024, 3, 15)
+
+    def test_stats(self):
+        stats = hc.RenderStats()
+        result = list(htmlcalendar(self.starting_date, observer=stats,
+                                   links=lambda d: "/x"))
+        self.assertListEqual(result, list(htmlcalendar(self.starting_date,
+                                                       links=lambda d: "/x")))
+        days = 31 + 29 + 31
+        self.assertEqual(stats.calls, {"links": days})
+        self.assertEqual(stats.months, 3)
+        self.assertEqual(stats.cells, days)
+        self.assertEqual(stats.bytes, len("".join(result).encode("utf-8")))
+        self.assertGreaterEqual(stats.format_time, 0)
+        self.assertEqual(stats.as_dict()["months"], 3)
+
+    def test_cells(self):
+        for render in (htmlcalendar, iter_htmlcalendar):
+            stats = hc.RenderStats()
+            cells = Mock(return_value={})
+            list(render(self.starting_date, months=6, observer=stats,
+                        cells=cells))
+            cells.assert_called_once()
+            self.assertEqual(stats.calls, {"cells": 1})
+        stats = hc.RenderStats()
+        CalendarRenderer().render_range(self.starting_date, months=6,
+                                        cells=cells, observer=stats)
+        self.assertEqual(stats.calls, {"cells": 1})
+        stats = hc.RenderStats()
+        htmlmonth(3, 2024, cells=cells, observer=stats)
+        self.assertEqual(stats.calls, {"cells": 1})
+
+    def test_observer(self):
+        observer = Mock(spec=hc.RenderObserver)
+        htmlmonth(2, 2024, observer=observer)
+        self.assertFalse(observer.callback.called)
+        htmlmonth(2, 2024, observer=observer, classes=lambda d: ["x"])
+        self.assertEqual(observer.callback.call_count, 29)
+        observer.callback.assert_called_with("classes", ANY)
+        args = observer.month.call_args[0]
+        self.assertEqual(args[:2], (2, 2024))
+        self.assertEqual(args[3], 29)
+
+
+class ParallelTestCase(unittest.TestCase):
+    starting_date = date(2024, 3, 15)
+    months = 24
+
+    def classes(self, date):
+        return [threading.current_thread().name] if date.day == 1 else []
+
+    def links(self, date):
+        return f"/{date.isoformat()}"
+
+    def expected(self, backwards):
+        return list(htmlcalendar(self.starting_date, self.months,
+                                 links=self.links, backwards=backwards))
+
+    def test_workers(self):
+        for backwards in (True, False):
+            result = htmlcalendar(self.starting_date, self.months,
+                                  links=self.links, backwards=backwards,
+                                  workers=4)
+            self.assertListEqual(list(result), self.expected(backwards))
+
+    def test_executor(self):
+        with ThreadPoolExecutor(4, thread_name_prefix="cal") as executor:
+            result = list(htmlcalendar(self.starting_date, self.months,
+                                       classes=self.classes,
+                                       executor=executor))
+            renderer = CalendarRenderer()
+            ranged = renderer.render_range(self.starting_date, self.months,
+                                           links=self.links,
+                                           executor=executor)
+        self.assertIn('class="cal_', result[0])
+        self.assertListEqual(ranged, self.expected(True))
+
+    def test_cells_fetched_once(self):
+        cells = Mock(return_value={})
+        htmlcalendar(self.starting_date, self.months, cells=cells, workers=8)
+        self.assertEqual(cells.call_count, 1)
+
+
+class BulkTestCase(unittest.TestCase):
+    jobs = [
+        {"id": "ana", "starting_date": "2024-03-15", "months": 2,
+         "events": [["2024-03-01", "2024-03-03", ["trip"], "/trip"]]},
+        {"id": "bob", "starting_date": "2024-01-01", "backwards": False,
+         "table_classes": ["cal"]},
+    ]
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.tmp.name, "out")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self, name):
+        with open(os.path.join(self.output, name + ".html")) as fp:
+            return fp.read()
+
+    def check_output(self):
+        expected = htmlcalendar(date(2024, 3, 15), months=2,
+                                classes=lambda d: ["trip"] if d.day <= 3
+                                and d.month == 3 else [],
+                                links=lambda d: "/trip" if d.day <= 3
+                                and d.month == 3 else "")
+        self.assertEqual(self.read("ana"), "".join(expected))
+        expected = htmlcalendar(date(2024, 1, 1), backwards=False,
+                                table_classes=["cal"])
+        self.assertEqual(self.read("bob"), "".join(expected))
+
+    def test_render_jobs(self):
+        result = hc.render_jobs(self.jobs, self.output, processes=1)
+        self.assertEqual(result["rendered"], 2)
+        self.check_output()
+        result = hc.render_jobs(self.jobs, self.output, processes=1,
+                                resume=True)
+        self.assertEqual((result["rendered"], result["skipped"]), (0, 2))
+
+    def test_process_pool(self):
+        result = hc.render_jobs(self.jobs, self.output, processes=2,
+                                chunksize=1)
+        self.assertEqual(result["rendered"], 2)
+        self.check_output()
+
+    def test_invalid_id(self):
+        self.assertRaises(ValueError, hc.job_path, self.output,
+                          {"id": "../evil"})
+
+    def test_main_jsonl(self):
+        path = os.path.join(self.tmp.name, "jobs.jsonl")
+        with open(path, "w") as fp:
+            for job in self.jobs:
+                fp.write(json.dumps(job) + "\n")
+        with patch("sys.stderr", new_callable=io.StringIO) as stderr:
+            self.assertEqual(hc.main([path, self.output, "--processes",
+                                      "1"]), 0)
+        self.assertIn("Rendered 2 calendars", stderr.getvalue())
+        self.check_output()
+
+    def test_main_csv(self):
+        path = os.path.join(self.tmp.name, "jobs.csv")
+        with open(path, "w") as fp:
+            fp.write("id,starting_date,months,backwards,table_classes,"
+                     "events\n")
+            fp.write('ana,2024-03-15,2,,,"[[""2024-03-01"", ""2024-03-03"", '
+                     '[""trip""], ""/trip""]]"\n')
+            fp.write("bob,2024-01-01,,false,cal,\n")
+        with patch("sys.stderr", new_callable=io.StringIO):
+            hc.main([path, self.output, "--processes", "1"])
+        self.check_output()
+
+
+class SkeletonTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_skeleton(self):
+        skeleton = hc.month_skeleton(2015, 2)
+        self.assertEqual(len(skeleton), 29)
+        self.assertEqual(skeleton[0], "<tr>\n" + 6 * "<td></td>")
+        self.assertEqual(skeleton[1], "</tr>\n<tr>\n")
+        self.assertEqual(skeleton[2], "")
+        self.assertTrue(skeleton[-1].endswith("</tr></table>\n\n"))
+        self.assertIs(skeleton, hc.month_skeleton(2026, 2))
+
+    def test_save_load(self):
+        path = os.path.join(self.tmp.name, "skeletons.json.gz")
+        hc.save_skeletons(path, 2000, 2030)
+        expected = dict(hc.SKELETONS)
+        with patch.dict(hc.SKELETONS, clear=True):
+            hc.load_skeletons(path)
+            self.assertEqual(len(hc.SKELETONS), 2 * 7 * 4)
+            for key, skeleton in hc.SKELETONS.items():
+                self.assertEqual(skeleton, expected[key])
+            with patch('htmlcalendar.build_skeleton') as build:
+                htmlcalendar(date(2024, 3, 15), months=24, caltype=1)
+                self.assertFalse(build.called)
+
+
+class EscapeCacheTestCase(unittest.TestCase):
+    def test_escaped(self):
+        for _ in range(2):
+            html = htmlday(date(2024, 1, 2), lambda d: ['"><script>'],
+                           lambda d: 'javascript:"x"',
+                           lambda d: {"<k>": "'v'"}, False)
+            self.assertNotIn("<script>", html)
+            self.assertNotIn("<k>", html)
+            self.assertIn('href="javascript:&quot;x&quot;"', html)
+
+    def test_safe_not_escaped(self):
+        html = hc.htmlcell(2, ["<b>"], "/a&b", {"k": "<v>"}, True)
+        self.assertEqual(html, '<td k="<v>" class="<b>"><a href="/a&b">2</a>'
+                               '</td>')
+
+    def test_memoized(self):
+        hc.td_tag.cache_clear()
+        for day in range(1, 11):
+            hc.htmlcell(day, ["booked"], "", {"data-kind": "x"}, False)
+        info = hc.td_tag.cache_info()
+        self.assertEqual((info.hits, info.misses), (9, 1))
+
+    def test_unhashable(self):
+        html = hc.htmlcell(2, [], "", {"k": ["a", "b"]}, True)
+        self.assertEqual(html, "<td k=\"['a', 'b']\">2</td>")
+
+    def test_equal_values(self):
+        for value in (1, True, 1.0, "1"):
+            html = hc.htmlcell(2, [], value, {"data-x": value}, True)
+            self.assertEqual(html, f'<td data-x="{value}"><a href="{value}">'
+                                   '2</a></td>')
+
+
+class SpecializedRendererTestCase(unittest.TestCase):
+    dates = [date(2024, 2, day) for day in range(1, 30)]
+
+    def classes(self, date):
+        return ["a<b", "c"] if date.day % 2 else []
+
+    def links(self, date):
+        return f"/x?d={date.day}&y" if date.day % 3 else ""
+
+    def attrs(self, date):
+        return {"data-d": str(date.day)} if date.day % 5 else {}
+
+    def test_combinations(self):
+        for safe in (False, True):
+            renderer = CalendarRenderer(safe=safe)
+            for classes in (nolist, self.classes):
+                for links in (nostr, self.links):
+                    for attrs in (noattrs, self.attrs):
+                        day_html = renderer.day_renderer(classes, links,
+                                                         attrs)
+                        for day in self.dates:
+                            self.assertEqual(day_html(day),
+                                             htmlday(day, classes, links,
+                                                     attrs, safe))
+
+    def test_links_not_str(self):
+        def links(date):
+            return True if date.day == 1 else 1
+        renderer = CalendarRenderer(safe=True)
+        day_html = renderer.day_renderer(links=links)
+        for day in self.dates[:3]:
+            self.assertEqual(day_html(day),
+                             htmlday(day, nolist, links, noattrs, True))
+        self.assertEqual(day_html(self.dates[1]),
+                         '<td><a href="1">2</a></td>')
+
+
+class LocalesTestCase(unittest.TestCase):
+    starting_date = date(2024, 3, 15)
+
+    def test_locales(self):
+        links = Mock(side_effect=lambda d: f"/{d.day}")
+        for backwards in (True, False):
+            links.reset_mock()
+            result = hc.htmlcalendar_locales(self.starting_date,
+                                             [None, "C"], links=links,
+                                             caltype=1, backwards=backwards)
+            self.assertEqual(links.call_count, 31 + 29 + 31 if backwards
+                             else 31 + 30 + 31)
+            for locale in (None, "C"):
+                expected = htmlcalendar(self.starting_date, links=links,
+                                        caltype=1, locale=locale,
+                                        backwards=backwards)
+                self.assertListEqual(result[locale], list(expected))
+        self.assertIn("<th>Sun</th>", result["C"][0])
+
+    def test_cells(self):
+        cells = Mock(return_value={date(2024, 3, 2): Cell(["x"])})
+        result = hc.htmlcalendar_locales(self.starting_date, ["C", None],
+                                         cells=cells)
+        self.assertEqual(cells.call_count, 1)
+        self.assertIn('<td class="x">2</td>', result["C"][2])
+        self.assertEqual(hc.htmlcalendar_locales(self.starting_date, []), {})
+
+
+class ModelTestCase(unittest.TestCase):
+    starting_date = date(2024, 3, 15)
+
+    def classes(self, date):
+        return ["odd"] if date.day % 2 else []
+
+    def links(self, date):
+        return f"/{date.day}" if date.day % 3 == 0 else ""
+
+    def attrs(self, date):
+        return {"title": "<5>"} if date.day == 5 else {}
+
+    def test_html(self):
+        classes = Mock(side_effect=self.classes)
+        model = hc.build_model(self.starting_date, classes=classes,
+                               links=self.links, attrs=self.attrs,
+                               caltype=1)
+        self.assertEqual(classes.call_count, 31 + 29 + 31)
+        expected = list(htmlcalendar(self.starting_date,
+                                     classes=self.classes, links=self.links,
+                                     attrs=self.attrs, caltype=1))
+        self.assertListEqual(model.serialize(), expected)
+        self.assertEqual(model.serialize("bytes"),
+                         "".join(expected).encode("utf-8"))
+        renderer = CalendarRenderer(caltype=1, table_classes=["t"])
+        self.assertIn('<table class="t">',
+                      model.serialize(renderer=renderer)[0])
+        self.assertEqual(classes.call_count, 31 + 29 + 31)
+        self.assertRaises(ValueError, model.serialize,
+                          renderer=CalendarRenderer())
+
+    def test_json(self):
+        cells = {date(2024, 2, 5): Cell(["a"], "/a", {"k": "v"})}
+        model = hc.build_model(self.starting_date, months=1,
+                               cells=lambda start, end: cells,
+                               backwards=False)
+        self.assertEqual(model.serialize("json"),
+                         hc.build_model(date(2024, 3, 1), months=1,
+                                        backwards=False).serialize("json"))
+        model = hc.build_model(date(2024, 2, 1), months=1,
+                               cells=lambda start, end: cells)
+        data = json.loads(model.serialize("json"))
+        month = data["months"][0]
+        self.assertEqual((month["year"], month["month"]), (2024, 2))
+        self.assertEqual(month["weeks"][0], [0, 0, 0, 1, 2, 3, 4])
+        self.assertEqual(month["days"], [{"date": "2024-02-05",
+                                          "classes": ["a"], "link": "/a",
+                                          "attrs": {"k": "v"}}])
+        model = hc.build_model(date(2024, 3, 1), months=1, caltype=1)
+        weeks = json.loads(model.serialize("json"))["months"][0]["weeks"]
+        self.assertEqual(weeks[0], [0, 0, 0, 0, 0, 1, 2])
+        self.assertEqual(weeks[-1], [31, 0, 0, 0, 0, 0, 0])
+
+    def test_slots(self):
+        model = hc.build_model(self.starting_date, classes=self.classes)
+        day = model.months[0].days[0]
+        self.assertFalse(hasattr(day, "__dict__"))
+        self.assertIsNone(model.months[0].days[1])
+
+
+class BufferTestCase(unittest.TestCase):
+    starting_date = date(2024, 3, 15)
+    months = 14
+
+    def links(self, date):
+        return f"/ñ/{date.isoformat()}"
+
+    def expected(self):
+        return "".join(htmlcalendar(self.starting_date, self.months,
+                                    links=self.links)).encode("utf-8")
+
+    def test_bytes(self):
+        self.assertEqual(hc.htmlcalendar_bytes(self.starting_date,
+                                               months=self.months,
+                                               links=self.links),
+                         self.expected())
+
+    def test_buffers(self):
+        expected = self.expected()
+        size = hc.estimate_size(self.starting_date, self.months)
+        self.assertGreaterEqual(size, len(expected))
+        array = bytearray()
+        written = hc.render_into(array, self.starting_date,
+                                 months=self.months, links=self.links)
+        self.assertEqual((written, bytes(array)), (len(expected), expected))
+        stream = io.BytesIO()
+        hc.render_into(stream, self.starting_date, months=self.months,
+                       links=self.links)
+        self.assertEqual(stream.getvalue(), expected)
+        view = memoryview(bytearray(size))
+        written = hc.render_into(view, self.starting_date,
+                                 months=self.months, links=self.links)
+        self.assertEqual(bytes(view[:written]), expected)
+
+    def test_too_small(self):
+        view = memoryview(bytearray(100))
+        self.assertRaises(ValueError, hc.render_into, view,
+                          self.starting_date)
+        size = hc.estimate_size(self.starting_date, self.months)
+        view = memoryview(bytearray(size))
+        self.assertRaises(ValueError, hc.render_into, view,
+                          self.starting_date, months=self.months,
+                          links=lambda d: "/" + "x" * 300)
+        self.assertEqual(bytes(view), bytes(size))
+
+    def test_estimate_plain(self):
+        html = "".join(htmlcalendar(self.starting_date, self.months))
+        size = hc.estimate_size(self.starting_date, self.months,
+                                cell_size=len("<td>31</td>"))
+        self.assertGreaterEqual(size, len(html))
+        self.assertLess(size, len(html) * 1.1)
+
+
+class RangeTestCase(unittest.TestCase):
+    def links(self, date):
+        return f"/{date.isoformat()}"
+
+    def rows(self, html):
+        parser = CalParser()
+        parser.feed(html)
+        rows = []
+        td = False
+        for item in parser.result:
+            if item[0] == "starttag" and item[1] == "tr":
+                rows.append([])
+            elif item[0] == "starttag" and item[1] == "td":
+                rows[-1].append("")
+                td = True
+            elif item[0] == "endtag" and item[1] == "td":
+                td = False
+            elif item[0] == "data" and td:
+                rows[-1][-1] = item[1]
+        return rows[1:]
+
+    def test_weeks(self):
+        links = Mock(side_effect=self.links)
+        html = hc.htmlrange(date(2024, 3, 14), weeks=2, links=links)
+        html_sanity_checker(html)
+        self.assertEqual(self.rows(html), [
+            ["", "", "", "14", "15", "16", "17"],
+            ["18", "19", "20", "21", "22", "23", "24"],
+        ])
+        self.assertEqual(links.call_count, 11)
+        self.assertIn(htmlday(date(2024, 3, 14), nolist, self.links,
+                              noattrs, False), html)
+
+    def test_end_date(self):
+        cells = Mock(return_value={date(2024, 4, 1): Cell(["new"])})
+        html = hc.htmlrange(date(2024, 3, 30), date(2024, 4, 2), caltype=1,
+                            cells=cells)
+        cells.assert_called_once_with(date(2024, 3, 30), date(2024, 4, 2))
+        self.assertEqual(self.rows(html), [
+            ["", "", "", "", "", "", "30"],
+            ["31", "1", "2", "", "", "", ""],
+        ])
+        self.assertIn('<td class="new">1</td>', html)
+        self.assertRaises(ValueError, hc.htmlrange, date(2024, 3, 30))
+
+    def test_sunday_weeks(self):
+        html = hc.htmlrange(date(2024, 3, 5), weeks=1, caltype=1)
+        self.assertEqual(self.rows(html), [
+            ["", "", "5", "6", "7", "8", "9"],
+        ])
+
+
+class CallbackCacheTestCase(unittest.TestCase):
+    starting_date = date(2024, 3, 15)
+
+    def setUp(self):
+        self.cache = hc.CallbackCache()
+        self.classes = Mock(side_effect=lambda d: ["x"] if d.day == 1 else [])
+        self.links = Mock(return_value=None)
+
+    def render(self, starting_date, namespace="tenant"):
+        return list(htmlcalendar(
+            starting_date,
+            classes=self.cache.wrap(self.classes, namespace),
+            links=self.cache.wrap(self.links, namespace)))
+
+    def test_overlap(self):
+        expected = list(htmlcalendar(self.starting_date,
+                                     classes=self.classes))
+        self.classes.reset_mock()
+        self.assertListEqual(self.render(self.starting_date), expected)
+        self.assertEqual(self.classes.call_count, 31 + 29 + 31)
+        self.render(date(2024, 4, 1))
+        self.assertEqual(self.classes.call_count, 31 + 29 + 31 + 30)
+        self.assertEqual(self.links.call_count, 31 + 29 + 31 + 30)
+        self.render(date(2024, 4, 1), namespace="other")
+        self.assertEqual(self.classes.call_count,
+                         31 + 29 + 31 + 30 + 29 + 31 + 30)
+
+    def test_invalidate(self):
+        self.render(self.starting_date)
+        self.render(self.starting_date, namespace="other")
+        size = len(self.cache)
+        self.cache.invalidate(date(2024, 3, 1))
+        self.assertEqual(len(self.cache), size - 4)
+        self.cache.invalidate(date(2024, 2, 1), date(2024, 2, 29),
+                              namespace="other")
+        self.assertEqual(len(self.cache), size - 4 - 58)
+        self.cache.invalidate(namespace="tenant")
+        self.assertEqual(len(self.cache), (31 + 31 - 1) * 2)
+        self.cache.invalidate()
+        self.assertEqual(len(self.cache), 0)
+
+    @patch('htmlcalendar.time.monotonic')
+    def test_ttl(self, monotonic):
+        cache = hc.CallbackCache(ttl=60)
+        monotonic.return_value = 0
+        classes = cache.wrap(self.classes, name="classes")
+        classes(date(2024, 3, 1))
+        classes = cache.wrap(Mock(), name="classes")
+        self.assertEqual(classes(date(2024, 3, 1)), ["x"])
+        monotonic.return_value = 61
+        classes(date(2024, 3, 1))
+        self.assertEqual(self.classes.call_count, 1)
+
+
+class FingerprintTestCase(unittest.TestCase):
+    starting_date = date(2024, 3, 15)
+
+    def test_stable(self):
+        fingerprint = hc.calendar_fingerprint(self.starting_date, version=1)
+        self.assertEqual(fingerprint,
+                         hc.calendar_fingerprint(date(2024, 3, 1),
+                                                 version=1,
+                                                 classes=lambda d: []))
+        changes = [{"version": 2}, {"months": 4}, {"caltype": 1},
+                   {"backwards": False}, {"table_classes": ["t"]},
+                   {"locale": "C"}, {"safe": True}, {"header": "h2"},
+                   {"compact": True}, {"padding": False}]
+        for change in changes:
+            options = {"version": 1, **change}
+            self.assertNotEqual(hc.calendar_fingerprint(self.starting_date,
+                                                        **options),
+                                fingerprint)
+        named = hc.calendar_fingerprint(self.starting_date, version=1,
+                                        locale="C")
+        with patch("htmlcalendar.lc.setlocale", return_value="es_ES.UTF-8"):
+            self.assertNotEqual(hc.calendar_fingerprint(self.starting_date,
+                                                        version=1),
+                                fingerprint)
+            self.assertEqual(hc.calendar_fingerprint(self.starting_date,
+                                                     version=1, locale="C"),
+                             named)
+        with self.assertRaises(TypeError):
+            hc.calendar_fingerprint(self.starting_date, verison=1)
+        with patch('htmlcalendar.__version__', "99"):
+            self.assertNotEqual(hc.calendar_fingerprint(self.starting_date,
+                                                        version=1),
+                                fingerprint)
+
+    def test_conditional(self):
+        classes = Mock(return_value=[])
+        fingerprint, result = hc.conditional_htmlcalendar(
+            self.starting_date, classes=classes, version="v1", months=2)
+        self.assertListEqual(list(result),
+                             list(htmlcalendar(self.starting_date, months=2)))
+        classes.reset_mock()
+        for header in (f'"{fingerprint}"', f'W/"{fingerprint}"',
+                       f'"other", "{fingerprint}"', "*"):
+            etag, result = hc.conditional_htmlcalendar(
+                self.starting_date, if_none_match=header, classes=classes,
+                version="v1", months=2)
+            self.assertEqual(etag, fingerprint)
+            self.assertIsNone(result)
+        self.assertFalse(classes.called)
+        etag, result = hc.conditional_htmlcalendar(
+            self.starting_date, if_none_match=f'"{fingerprint}"',
+            version="v2", months=2)
+        self.assertIsNotNone(result)
+
+
+class CompactTestCase(unittest.TestCase):
+    starting_date = date(2024, 3, 15)
+
+    def classes(self, day):
+        return ["odd"] if day.day % 2 else []
+
+    def links(self, day):
+        return f"/day/{day.day}"
+
+    def test_compact(self):
+        for caltype in (0, 1):
+            for months in range(1, 13):
+                expected = list(htmlcalendar(date(2024, months, 1),
+                                             months=1, caltype=caltype,
+                                             classes=self.classes,
+                                             links=self.links))
+                result = list(htmlcalendar(date(2024, months, 1), months=1,
+                                           caltype=caltype, compact=True,
+                                           classes=self.classes,
+                                           links=self.links))
+                self.assertListEqual(result, [
+                    html.replace("\n", "")
+                        .replace("<td></td>", "<td>")
+                        .replace("&nbsp;</td>", "&nbsp;")
+                    for html in expected])
+
+    def test_padding(self):
+        # March 2021 fits in five weeks and gets the padding row
+        month = htmlmonth(3, 2021)
+        self.assertIn(hc.EMPTY_ROW, month)
+        self.assertEqual(htmlmonth(3, 2021, padding=False),
+                         month.replace(hc.EMPTY_ROW, ""))
+        compact = htmlmonth(3, 2021, compact=True, padding=False)
+        self.assertNotIn("&nbsp;", compact)
+        self.assertLess(len(compact), len(month))
+
+    def test_range(self):
+        start = date(2024, 3, 13)
+        end = date(2024, 3, 20)
+        expected = hc.htmlrange(start, end)
+        renderer = CalendarRenderer(compact=True)
+        self.assertEqual(renderer.render_days(start, end),
+                         expected.replace("\n", "")
+                                 .replace("<td></td>", "<td>"))
+
+    def test_gzip(self):
+        data = hc.htmlcalendar_bytes(self.starting_date, months=6,
+                                     compact=True)
+        compressed = hc.htmlcalendar_gzip(self.starting_date, months=6,
+                                          compact=True)
+        self.assertEqual(gzip.decompress(compressed), data)
+
+    def test_dictionary(self):
+        for compact in (False, True):
+            data = htmlmonth(3, 2024, compact=compact).encode("utf-8")
+            compressed = hc.compress_calendar(data)
+            self.assertEqual(hc.decompress_calendar(compressed), data)
+            self.assertLess(len(compressed), len(zlib.compress(data)))
+
+
+class GridTestCase(unittest.TestCase):
+
+    def test_year(self):
+        classes = Mock(side_effect=lambda d: ["odd"] if d.day % 2 else [])
+        html = hc.htmlyear(2024, classes=classes, table_classes=["month"],
+                           grid_classes=["year"])
+        self.assertEqual(classes.call_count, 366)
+        months = list(htmlcalendar(date(2024, 1, 1), months=12,
+                                   backwards=False, table_classes=["month"],
+                                   classes=lambda d: ["odd"] if d.day % 2
+                                   else []))
+        rows = ["<tr>\n"
+                + "".join(f"<td>{month}</td>" for month in months[i:i + 3])
+                + "</tr>\n" for i in range(0, 12, 3)]
+        self.assertEqual(html, '<table class="year">\n' + "".join(rows)
+                         + "</table>\n\n")
+
+    def test_columns(self):
+        html = hc.htmlgrid(date(2024, 11, 1), months=5, columns=2)
+        months = list(htmlcalendar(date(2024, 11, 1), months=5,
+                                   backwards=False))
+        self.assertIn(f"<tr>\n<td>{months[0]}</td><td>{months[1]}</td>"
+                      "</tr>\n", html)
+        self.assertTrue(html.endswith(f"<td>{months[4]}</td><td></td>"
+                                      "</tr>\n</table>\n\n"))
+        backwards = hc.htmlgrid(date(2025, 3, 1), months=5, columns=2,
+                                backwards=True)
+        self.assertEqual(backwards, html)
+        with self.assertRaises(ValueError):
+            hc.htmlgrid(date(2024, 11, 1), columns=0)
+
+    def test_cells(self):
+        cells = Mock(return_value={date(2024, 2, 29): Cell(["leap"])})
+        html = hc.htmlyear(2024, columns=4, cells=cells, compact=True)
+        cells.assert_called_once_with(date(2024, 1, 1), date(2024, 12, 31))
+        self.assertIn('<td class="leap">29</td>', html)
+        self.assertNotIn("\n", html)
+
+
+class LayoutsTestCase(unittest.TestCase):
+    month_list = list(forward_iterator(date(1890, 1, 1), 12 * 220 - 1))
+
+    def expected(self):
+        return [calendar.monthrange(year, month)
+                for month, year in self.month_list]
+
+    def test_python(self):
+        with patch('htmlcalendar.numpy', None):
+            self.assertListEqual(hc.month_layouts(self.month_list),
+                                 self.expected())
+
+    @unittest.skipIf(hc.numpy is None, "NumPy is not installed")
+    def test_numpy(self):
+        self.assertListEqual(hc.month_layouts(self.month_list),
+                             self.expected())
+        self.assertListEqual(hc.month_layouts([]), [])
+
+    def test_short_lists(self):
+        month_list = self.month_list[:hc.NUMPY_MIN_MONTHS - 1]
+        with patch('htmlcalendar.numpy') as numpy:
+            self.assertListEqual(hc.month_layouts(month_list),
+                                 self.expected()[:len(month_list)])
+        self.assertFalse(numpy.array.called)
+
+    def test_render_months(self):
+        def links(day):
+            return f"/day/{day.isoformat()}" if day.day % 3 else ""
+        month_list = self.month_list[1200:1500]
+        renderer = CalendarRenderer(caltype=1)
+        expected = [htmlmonth(month, year, links=links, caltype=1)
+                    for month, year in month_list]
+        self.assertListEqual(renderer.render_months(month_list, links=links),
+                             expected)
+        self.assertListEqual(
+            renderer.render_range(date(2014, 12, 1), months=300,
+                                  links=links), expected)
+
+
 if __name__ == "__main__":
     unittest.main()